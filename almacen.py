@@ -0,0 +1,260 @@
+import json
+import os
+import sys
+import numpy as np
+
+from catalogo import obtener_catalogo
+
+# -----------------------------
+# Nivel 2.f: Almacén columnar de resultados
+# -----------------------------
+# Guarda los resultados de los lotes en un directorio con un archivo binario por
+# columna (se agregan filas al final) y un esquema.json con la cantidad de filas
+# confirmadas y mínimos/máximos por bloque. Las consultas abren las columnas con
+# np.memmap, leen solo las que usan y saltan los bloques cuyo rango no puede
+# cumplir los filtros, por ejemplo:
+#   alm.consultar('temp_final', 'media', pid='Pizza', eid=2, tid='Moto/Scooter', dist_km=(5, None))
+
+COLUMNAS = (('pid', '<i4'), ('eid', '<i4'), ('tid', '<i4'), ('dist_km', '<f8'), ('k', '<f8'),
+            ('tiempo_min', '<f8'), ('temp_final', '<f8'), ('temp_corrected', '<f8'),
+            ('tiempo_critico', '<f8'), ('temp_ambiente', '<f8'), ('indice', '<i1'))
+FILAS_BLOQUE = 262_144
+AGREGADOS = ('cuenta', 'suma', 'media', 'min', 'max', 'std')   # y percentiles 'p50', 'p95', ...
+NOMBRES = {'pid': 'productos', 'eid': 'empaques', 'tid': 'transportes'}
+
+
+class AlmacenResultados:
+    def __init__(self, directorio, filas_bloque=FILAS_BLOQUE):
+        self.directorio = directorio
+        self._ruta_esquema = os.path.join(directorio, 'esquema.json')
+        if os.path.exists(self._ruta_esquema):
+            with open(self._ruta_esquema, encoding='utf-8') as f:
+                self.esquema = json.load(f)
+        else:
+            os.makedirs(directorio, exist_ok=True)
+            self.esquema = {'filas': 0, 'filas_bloque': filas_bloque,
+                            'columnas': dict(COLUMNAS), 'zonas': {c: [] for c, _ in COLUMNAS}}
+            self._guardar_esquema()
+        self.dtypes = {c: np.dtype(d) for c, d in self.esquema['columnas'].items()}
+
+    def __len__(self):
+        return self.esquema['filas']
+
+    def _ruta(self, columna):
+        return os.path.join(self.directorio, columna + '.bin')
+
+    def _guardar_esquema(self):
+        # Reemplazo atómico: un lector nunca ve más filas que las ya escritas.
+        tmp = self._ruta_esquema + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.esquema, f)
+        os.replace(tmp, self._ruta_esquema)
+
+    # --- Escritura ---
+    def agregar(self, res, indice=None):
+        n = len(res)
+        if n == 0:
+            return
+        if indice is None:
+            from lote import evaluar_lote
+            indice = evaluar_lote(res).indice
+        ta = res.temp_ambiente
+        if ta is None:
+            import nucleo
+            ta = nucleo.TEMP_AMBIENTE
+        datos = {c: getattr(res, c) for c in self.dtypes if c not in ('temp_ambiente', 'indice')}
+        datos['temp_ambiente'] = np.broadcast_to(np.asarray(ta, dtype=np.float64), (n,))
+        datos['indice'] = indice
+
+        filas = self.esquema['filas']
+        b = self.esquema['filas_bloque']
+        for c, dtype in self.dtypes.items():
+            arr = np.ascontiguousarray(datos[c], dtype=dtype)
+            with open(self._ruta(c), 'ab') as f:
+                # Descarta filas no confirmadas de una escritura interrumpida.
+                f.truncate(filas * dtype.itemsize)
+                f.write(arr.tobytes())
+            zonas = self.esquema['zonas'][c]
+            inicio = filas
+            while inicio < filas + n:
+                blq = inicio // b
+                fin = min((blq + 1) * b, filas + n)
+                trozo = arr[inicio - filas:fin - filas]
+                mn, mx = trozo.min().item(), trozo.max().item()
+                if blq < len(zonas):
+                    zonas[blq] = [min(zonas[blq][0], mn), max(zonas[blq][1], mx)]
+                else:
+                    zonas.append([mn, mx])
+                inicio = fin
+        self.esquema['filas'] = filas + n
+        self._guardar_esquema()
+
+    # --- Lectura ---
+    def columna(self, nombre) -> np.ndarray:
+        n = len(self)
+        if n == 0:
+            return np.empty(0, dtype=self.dtypes[nombre])
+        return np.memmap(self._ruta(nombre), dtype=self.dtypes[nombre], mode='r', shape=(n,))
+
+    def _normalizar(self, columna, valor):
+        # Acepta nombres del catálogo para pid/eid/tid ('Pizza', 'Moto/Scooter').
+        if columna in NOMBRES:
+            tabla = getattr(obtener_catalogo(), NOMBRES[columna])
+            def a_id(v):
+                if isinstance(v, str):
+                    ids = [i for i, fila in tabla.items() if fila.nombre == v]
+                    if not ids:
+                        raise KeyError(f"Nombre desconocido para {columna}: {v}")
+                    return ids[0]
+                return v
+            if isinstance(valor, (list, set, frozenset)):
+                return [a_id(v) for v in valor]
+            return a_id(valor)
+        return valor
+
+    def _posible(self, columna, valor, blq):
+        # ¿Puede el bloque contener filas que cumplan el filtro? (NaN nunca descarta)
+        mn, mx = self.esquema['zonas'][columna][blq]
+        if isinstance(valor, tuple):
+            lo, hi = valor
+            return not ((lo is not None and mx < lo) or (hi is not None and mn >= hi))
+        if isinstance(valor, list):
+            return any(not (v < mn or v > mx) for v in valor)
+        return not (valor < mn or valor > mx)
+
+    @staticmethod
+    def _mascara(datos, valor):
+        if isinstance(valor, tuple):
+            lo, hi = valor
+            m = np.ones(len(datos), dtype=bool)
+            if lo is not None:
+                m &= datos >= lo
+            if hi is not None:
+                m &= datos < hi
+            return m
+        if isinstance(valor, list):
+            return np.isin(datos, valor)
+        return datos == valor
+
+    def filtrar(self, columnas, **filtros):
+        # Genera (inicio, {columna: valores filtrados}) por bloque.
+        # Filtros: valor exacto, lista de valores o rango (min, max) semiabierto [min, max).
+        for c in list(columnas) + list(filtros):
+            if c not in self.dtypes:
+                raise KeyError(f"Columna desconocida: {c}")
+        filtros = {c: self._normalizar(c, v) for c, v in filtros.items()}
+        n = len(self)
+        b = self.esquema['filas_bloque']
+        mapas = {c: self.columna(c) for c in set(columnas) | set(filtros)}
+        for blq in range((n + b - 1) // b):
+            if not all(self._posible(c, v, blq) for c, v in filtros.items()):
+                continue
+            sl = slice(blq * b, min((blq + 1) * b, n))
+            m = None
+            for c, v in filtros.items():
+                mc = self._mascara(mapas[c][sl], v)
+                m = mc if m is None else m & mc
+            if m is not None and not m.any():
+                continue
+            yield sl.start, {c: (np.asarray(mapas[c][sl]) if m is None else mapas[c][sl][m]) for c in columnas}
+
+    def consultar(self, columna='temp_final', agregado='media', por=None, **filtros):
+        # Agregado de una columna sobre las filas que cumplen los filtros. Con por='tid'
+        # (u otra columna entera) devuelve {valor: agregado} por grupo.
+        percentil = None
+        if agregado.startswith('p') and agregado[1:].replace('.', '', 1).isdigit():
+            percentil = float(agregado[1:])
+        elif agregado not in AGREGADOS:
+            raise ValueError(f"Agregado desconocido: {agregado}")
+        columnas = [columna] if por is None else [columna, por]
+        if por is not None and self.dtypes[por].kind not in 'iu':
+            raise ValueError(f"Solo se puede agrupar por columnas enteras: {por}")
+
+        cuenta, suma, suma2, minimo, maximo, valores = {}, {}, {}, {}, {}, {}
+        for _, datos in self.filtrar(columnas, **filtros):
+            v = datos[columna].astype(np.float64)
+            grupos = [(None, v)] if por is None else _agrupar(datos[por], v)
+            for g, vg in grupos:
+                cuenta[g] = cuenta.get(g, 0) + len(vg)
+                if percentil is not None:
+                    valores.setdefault(g, []).append(vg)
+                    continue
+                suma[g] = suma.get(g, 0.0) + vg.sum()
+                suma2[g] = suma2.get(g, 0.0) + (vg * vg).sum()
+                minimo[g] = min(minimo.get(g, np.inf), vg.min())
+                maximo[g] = max(maximo.get(g, -np.inf), vg.max())
+
+        def resultado(g):
+            c = cuenta.get(g, 0)
+            if agregado == 'cuenta':
+                return c
+            if c == 0:
+                return float('nan')
+            if percentil is not None:
+                return float(np.percentile(np.concatenate(valores[g]), percentil))
+            if agregado == 'suma':
+                return float(suma[g])
+            if agregado == 'media':
+                return float(suma[g] / c)
+            if agregado == 'min':
+                return float(minimo[g])
+            if agregado == 'max':
+                return float(maximo[g])
+            media = suma[g] / c
+            return float(np.sqrt(max(suma2[g] / c - media * media, 0.0)))
+
+        if por is None:
+            return resultado(None)
+        return {g: resultado(g) for g in sorted(cuenta)}
+
+
+def _agrupar(claves, valores):
+    orden = np.argsort(claves, kind='stable')
+    claves, valores = claves[orden], valores[orden]
+    unicos, inicios = np.unique(claves, return_index=True)
+    return [(int(g), v) for g, v in zip(unicos, np.split(valores, inicios[1:]))]
+
+
+def _parsear_filtro(texto):
+    # 'pid=13', 'pid=Pizza', 'tid=1,2', 'dist_km=5:' (rango [5, ∞)), 'dist_km=2:5'
+    columna, _, valor = texto.partition('=')
+    def num(v):
+        try:
+            return int(v)
+        except ValueError:
+            try:
+                return float(v)
+            except ValueError:
+                return v
+    if ':' in valor:
+        lo, _, hi = valor.partition(':')
+        return columna, (num(lo) if lo else None, num(hi) if hi else None)
+    if ',' in valor:
+        return columna, [num(v) for v in valor.split(',')]
+    return columna, num(valor)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Consultas agregadas sobre un almacén de resultados")
+    parser.add_argument('directorio')
+    parser.add_argument('--columna', default='temp_final')
+    parser.add_argument('--agregado', default='media', help="cuenta, suma, media, min, max, std o pNN")
+    parser.add_argument('--por', help="Agrupar por una columna entera (pid, eid, tid, indice)")
+    parser.add_argument('--filtro', action='append', default=[], help="columna=valor | a,b | min:max")
+    args = parser.parse_args(argv)
+    if not os.path.exists(os.path.join(args.directorio, 'esquema.json')):
+        print(f"No hay un almacén en: {args.directorio}", file=sys.stderr)
+        sys.exit(1)
+    alm = AlmacenResultados(args.directorio)
+    filtros = dict(_parsear_filtro(f) for f in args.filtro)
+    res = alm.consultar(args.columna, args.agregado, args.por, **filtros)
+    if isinstance(res, dict):
+        for g, v in res.items():
+            print(f"{g}\t{v}")
+    else:
+        print(res)
+
+
+if __name__ == '__main__':
+    main()
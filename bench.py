@@ -0,0 +1,332 @@
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import okok
+from catalogo import obtener_catalogo
+
+# -----------------------------
+# Herramienta: Benchmarks de los caminos críticos
+# -----------------------------
+# Mide procesar_entrega, DeliverySim.__post_init__, time_to_temp, analysis_report,
+# generate_image y plot_temperature_profile (y simular_lote como referencia) para
+# varios tamaños de lote, un caso por categoría de producto y los casos borde
+# (distancia cero y k = inf). Reporta pedidos/s, latencia p50/p90/p99 por pedido y
+# memoria pico (tracemalloc, en una pasada aparte para no distorsionar los tiempos).
+# 'arranque' mide un proceso nuevo que importa okok y simula un pedido, y falla si ese
+# camino escalar carga NumPy, PIL o matplotlib. --verificar compara el camino escalar con
+# el de lotes en toda la grilla del catálogo, con varias temperaturas ambiente.
+#
+#   python bench.py --salida base.json
+#   python bench.py --salida nuevo.json --comparar base.json --umbral 0.10
+#   python bench.py --verificar
+
+TAMANOS = (1, 100, 1000)
+MAX_COSTOSO = 20          # imágenes y gráficos: tamaño máximo de lote
+REPETICIONES = 5
+UMBRAL = 0.10
+PID_K_INF = 9999          # producto temporal con masa 0 (k = inf)
+MODULOS_PESADOS = ('numpy', 'PIL', 'matplotlib')
+
+# caso -> (pid, eid, tid, dist_km)
+CASOS = {
+    'bebida_caliente': (1, 2, 1, 3.5),
+    'bebida_fria': (9, 4, 3, 2.0),
+    'comida_caliente': (13, 2, 1, 5.0),
+    'comida_fria': (17, 5, 2, 4.0),
+    'distancia_cero': (13, 1, 4, 0.0),
+    'k_inf': (PID_K_INF, 3, 1, 3.0),
+}
+
+
+@contextlib.contextmanager
+def _producto_k_inf():
+    cat = obtener_catalogo()
+    cat.actualizar_producto(PID_K_INF, {"nombre": "Prueba k=inf", "categoria": "comida_caliente",
+                                        "masa_std": 0, "temp_std": 75})
+    try:
+        yield
+    finally:
+        del cat.fuente_productos[PID_K_INF]
+        cat.actualizar_producto(PID_K_INF)
+
+
+# Grilla de verificación: todos los productos, empaques y transportes por estas distancias
+# y temperaturas ambiente (None = TEMP_AMBIENTE; 2 °C aleja a las bebidas frías de su
+# temperatura crítica, 80 °C a las calientes).
+AMBIENTES_VERIFICACION = (None, 2.0, 35.0, 80.0)
+DISTANCIAS_VERIFICACION = (0.0, 0.5, 3.0, 8.0)
+TOLERANCIA_REL = 1e-13    # math.exp y np.exp difieren en unos pocos ULP
+
+
+def _cercanos(a, b):
+    a = float('nan') if a is None else float(a)
+    b = float(b)
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    if math.isinf(a) or math.isinf(b):
+        return a == b
+    return math.isclose(a, b, rel_tol=TOLERANCIA_REL, abs_tol=1e-12)
+
+
+def verificar_equivalencia(ambientes=AMBIENTES_VERIFICACION, distancias=DISTANCIAS_VERIFICACION):
+    # procesar_entrega + evaluar_entrega contra simular_lote + evaluar_lote. El índice
+    # puede diferir solo si el puntaje combinado cae justo en un límite de redondeo.
+    import itertools
+    import numpy as np
+    from lote import simular_lote, evaluar_lote
+    cat = obtener_catalogo()
+    grilla = list(itertools.product(sorted(cat.productos), sorted(cat.empaques),
+                                    sorted(cat.transportes), distancias))
+    cols = [np.array(c) for c in zip(*grilla)]
+    diferencias = []
+    for ta in ambientes:
+        res = simular_lote(*cols, temp_ambiente=ta)
+        ev = evaluar_lote(res)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i, pedido in enumerate(grilla):
+                sim = okok.procesar_entrega(*pedido, ta)
+                esc = okok.evaluar_entrega(sim)
+                pares = (('k', sim.k, res.k[i]), ('tiempo_min', sim.tiempo_min, res.tiempo_min[i]),
+                         ('temp_final', sim.temp_final, res.temp_final[i]),
+                         ('temp_corrected', sim.temp_corrected, res.temp_corrected[i]),
+                         ('tiempo_critico', sim.critical_time(), res.tiempo_critico[i]),
+                         ('score_combinado', esc.score_combinado, ev.score_combinado[i]),
+                         ('temp_aislamiento_ideal', esc.temp_aislamiento_ideal, ev.temp_aislamiento_ideal[i]))
+                for campo, a, b in pares:
+                    if not _cercanos(a, b):
+                        diferencias.append((pedido, ta, campo, a, float(b)))
+                x = esc.score_combinado * 9
+                en_limite = abs(x - math.floor(x) - 0.5) < 1e-9
+                if esc.indice != ev.indice[i] and not en_limite:
+                    diferencias.append((pedido, ta, 'indice', esc.indice, int(ev.indice[i])))
+    return diferencias, len(grilla) * len(ambientes)
+
+
+def _percentil(ordenados, p):
+    i = min(len(ordenados) - 1, max(0, int(round(p / 100 * (len(ordenados) - 1)))))
+    return ordenados[i]
+
+
+# Cada benchmark recibe la lista de pedidos y devuelve una función que los procesa
+# uno por uno (así se toma la latencia por pedido) o de una vez (lote=True).
+def _b_procesar_entrega(pedidos, tmp):
+    return lambda p: okok.procesar_entrega(*p)
+
+
+def _b_post_init(pedidos, tmp):
+    sims = {p: okok.procesar_entrega(*p) for p in set(pedidos)}
+
+    def correr(p):
+        s = sims[p]
+        return okok.DeliverySim(s.food, s.pack, s.tiempo_min, s.transporte, s.dist_km)
+    return correr
+
+
+def _b_time_to_temp(pedidos, tmp):
+    sims = {p: okok.procesar_entrega(*p) for p in set(pedidos)}
+    return lambda p: sims[p].critical_time()
+
+
+def _b_analysis_report(pedidos, tmp):
+    sims = {p: okok.procesar_entrega(*p) for p in set(pedidos)}
+    return lambda p: sims[p].analysis_report()
+
+
+def _b_generate_image(pedidos, tmp):
+    sims = {p: okok.procesar_entrega(*p) for p in set(pedidos)}
+    ruta = os.path.join(tmp, 'resumen.png')
+    return lambda p: sims[p].generate_image(ruta)
+
+
+def _b_plot_temperature_profile(pedidos, tmp):
+    import matplotlib
+    matplotlib.use('Agg')
+    sims = {p: okok.procesar_entrega(*p) for p in set(pedidos)}
+    ruta = os.path.join(tmp, 'perfil.png')
+    return lambda p: sims[p].plot_temperature_profile(path=ruta)
+
+
+def _b_simular_lote(pedidos, tmp):
+    import numpy as np
+    from lote import simular_lote
+    cols = [np.array(c) for c in zip(*pedidos)]
+    return lambda _: simular_lote(*cols)
+
+
+# nombre -> (constructor, costoso, lote)
+BENCHMARKS = {
+    'procesar_entrega': (_b_procesar_entrega, False, False),
+    'post_init': (_b_post_init, False, False),
+    'time_to_temp': (_b_time_to_temp, False, False),
+    'analysis_report': (_b_analysis_report, False, False),
+    'generate_image': (_b_generate_image, True, False),
+    'plot_temperature_profile': (_b_plot_temperature_profile, True, False),
+    'simular_lote': (_b_simular_lote, False, True),
+}
+
+
+def medir(nombre, caso, n, repeticiones=REPETICIONES, tmp='.'):
+    construir, _, es_lote = BENCHMARKS[nombre]
+    pedidos = [CASOS[caso]] * n
+    correr = construir(pedidos, tmp)
+    reloj = time.perf_counter
+    latencias, totales = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        correr(pedidos[0])  # calentamiento (fuentes, backend, cachés)
+        for _ in range(repeticiones):
+            inicio = reloj()
+            if es_lote:
+                correr(None)
+                latencias.append((reloj() - inicio) / n)
+            else:
+                for p in pedidos:
+                    t = reloj()
+                    correr(p)
+                    latencias.append(reloj() - t)
+            totales.append(reloj() - inicio)
+
+        tracemalloc.start()
+        if es_lote:
+            correr(None)
+        else:
+            for p in pedidos:
+                correr(p)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    latencias.sort()
+    return {
+        'benchmark': nombre, 'caso': caso, 'n': n,
+        'pedidos_s': n / min(totales),
+        'p50_us': _percentil(latencias, 50) * 1e6,
+        'p90_us': _percentil(latencias, 90) * 1e6,
+        'p99_us': _percentil(latencias, 99) * 1e6,
+        'memoria_pico_kib': pico / 1024,
+    }
+
+
+def medir_arranque(repeticiones=REPETICIONES):
+    import subprocess
+    codigo = ("import sys, io, contextlib, okok\n"
+              "with contextlib.redirect_stdout(io.StringIO()):\n"
+              "    okok.procesar_entrega(13, 2, 1, 3.5).analysis_report()\n"
+              f"print(','.join(m for m in {MODULOS_PESADOS!r} if m in sys.modules))")
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True,
+                              check=True, cwd=directorio)
+        tiempos.append(time.perf_counter() - inicio)
+    tiempos.sort()
+    cargados = proc.stdout.strip()
+    return {
+        'benchmark': 'arranque', 'caso': 'escalar', 'n': 1,
+        'pedidos_s': 1 / tiempos[0],
+        'p50_us': _percentil(tiempos, 50) * 1e6,
+        'p90_us': _percentil(tiempos, 90) * 1e6,
+        'p99_us': _percentil(tiempos, 99) * 1e6,
+        'memoria_pico_kib': 0.0,
+        'modulos_pesados': cargados.split(',') if cargados else [],
+    }
+
+
+def correr_todo(benchmarks=None, casos=None, tamanos=TAMANOS, repeticiones=REPETICIONES, salida=sys.stderr):
+    resultados = {}
+    benchmarks = benchmarks or ['arranque'] + list(BENCHMARKS)
+    if 'arranque' in benchmarks:
+        r = medir_arranque(repeticiones)
+        resultados['arranque/escalar/1'] = r
+        print(f"{'arranque':<26}{'escalar':<17}{1:>6}  p50 {r['p50_us'] / 1000:>9.1f} ms  "
+              f"módulos pesados: {', '.join(r['modulos_pesados']) or 'ninguno'}", file=salida)
+    with _producto_k_inf(), tempfile.TemporaryDirectory() as tmp:
+        for nombre in (b for b in benchmarks if b in BENCHMARKS):
+            costoso = BENCHMARKS[nombre][1]
+            for caso in casos or CASOS:
+                for n in sorted({min(n, MAX_COSTOSO) if costoso else n for n in tamanos}):
+                    r = medir(nombre, caso, n, repeticiones, tmp)
+                    resultados[f"{nombre}/{caso}/{n}"] = r
+                    print(f"{nombre:<26}{caso:<17}{n:>6}  {r['pedidos_s']:>12,.0f} ped/s  "
+                          f"p50 {r['p50_us']:>9.1f} µs  p99 {r['p99_us']:>9.1f} µs  "
+                          f"pico {r['memoria_pico_kib']:>9.1f} KiB", file=salida)
+    return resultados
+
+
+def metadatos():
+    import numpy as np
+    return {'fecha': datetime.now().isoformat(timespec='seconds'), 'python': platform.python_version(),
+            'numpy': np.__version__, 'plataforma': platform.platform()}
+
+
+def comparar(base, nuevo, umbral=UMBRAL):
+    # Regresión: el rendimiento cae o la latencia p50 sube más que el umbral (fracción).
+    regresiones = []
+    for clave, r in nuevo.items():
+        b = base.get(clave)
+        if b is None:
+            continue
+        caida = 1 - r['pedidos_s'] / b['pedidos_s']
+        subida = r['p50_us'] / b['p50_us'] - 1 if b['p50_us'] > 0 else 0.0
+        if caida > umbral or subida > umbral:
+            regresiones.append((clave, caida, subida))
+    return regresiones
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmarks de la simulación de entregas")
+    parser.add_argument('--benchmarks', nargs='+', choices=['arranque'] + list(BENCHMARKS))
+    parser.add_argument('--casos', nargs='+', choices=list(CASOS))
+    parser.add_argument('--tamanos', nargs='+', type=int, default=list(TAMANOS))
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES)
+    parser.add_argument('--salida', help="Guardar resultados en este archivo JSON")
+    parser.add_argument('--comparar', help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument('--umbral', type=float, default=UMBRAL, help="Fracción tolerada (0.10 = 10%%)")
+    parser.add_argument('--verificar', action='store_true',
+                        help="Solo comparar el camino escalar con el de lotes y terminar")
+    args = parser.parse_args(argv)
+
+    if args.verificar:
+        diferencias, casos = verificar_equivalencia()
+        for pedido, ta, campo, escalar, lote in diferencias[:20]:
+            print(f"DIFERENCIA {pedido} ambiente={ta} {campo}: escalar {escalar} / lote {lote}", file=sys.stderr)
+        print(f"{casos} casos, {len(diferencias)} diferencias.", file=sys.stderr)
+        if diferencias:
+            sys.exit(1)
+        return
+
+    resultados = correr_todo(args.benchmarks, args.casos, args.tamanos, args.repeticiones)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({'meta': metadatos(), 'resultados': resultados}, f, indent=1, ensure_ascii=False)
+        print(f"Resultados guardados en: {args.salida}", file=sys.stderr)
+    fallo = False
+    arranque = resultados.get('arranque/escalar/1')
+    if arranque and arranque['modulos_pesados']:
+        print(f"REGRESIÓN arranque: el camino escalar cargó {', '.join(arranque['modulos_pesados'])}",
+              file=sys.stderr)
+        fallo = True
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)['resultados']
+        regresiones = comparar(base, resultados, args.umbral)
+        for clave, caida, subida in regresiones:
+            print(f"REGRESIÓN {clave}: rendimiento {-caida:+.1%}, p50 {subida:+.1%}", file=sys.stderr)
+        if not regresiones:
+            print(f"Sin regresiones (umbral {args.umbral:.0%}).", file=sys.stderr)
+        fallo = fallo or bool(regresiones)
+    if fallo:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
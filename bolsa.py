@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+import numpy as np
+
+import nucleo
+from catalogo import obtener_catalogo
+
+# -----------------------------
+# Nivel 1.h: Bolsa con varios productos
+# -----------------------------
+# Los productos de una misma bolsa intercambian calor entre sí y con el ambiente:
+#   C_i dT_i/dt = -U·A_i (T_i - Ta) - sum_j G_ij (T_i - T_j)
+# con C_i = m_i·cp_i y G_ij = U_contacto·A_contacto. Es un sistema lineal
+#   dθ/dt = -C^-1 K θ,  θ = T - Ta,  K = diag(U·A) + Laplaciano(G)
+# que se resuelve de forma exacta con la descomposición espectral de la matriz
+# simétrica S = C^-1/2 K C^-1/2, apilada para muchas bolsas del mismo tamaño.
+# Con un solo producto se reduce a la ley de Newton de DeliverySim.
+
+U_CONTACTO = 10.0  # W/m²·°C entre productos que se tocan dentro de la bolsa
+
+
+@dataclass
+class ResultadoBolsas:
+    pids: np.ndarray          # (B, n)
+    tiempo_min: np.ndarray    # (B,)
+    temp_inicial: np.ndarray  # (B, n)
+    temp_final: np.ndarray    # (B, n)
+    tiempos: np.ndarray = None   # (B, P) si se pidió el perfil
+    perfil: np.ndarray = None    # (B, P, n)
+
+    def __len__(self):
+        return len(self.tiempo_min)
+
+
+def area_contacto(dims_a, dims_b):
+    # Se asume que se tocan por la base más pequeña de las dos.
+    return np.minimum(dims_a[..., 0] * dims_a[..., 1], dims_b[..., 0] * dims_b[..., 1])
+
+
+def _descomponer(pids, eids, cat, u_contacto):
+    u = cat.u_val[eids][:, None]                               # (B, 1)
+    cap = cat.masa[pids] * cat.cp[pids]                        # (B, n)
+    if not np.all(cap > 0):
+        raise ValueError("Todos los productos de la bolsa deben tener masa y cp positivos.")
+    dims = cat.dims[pids]                                      # (B, n, 3)
+    g = u_contacto * area_contacto(dims[:, :, None, :], dims[:, None, :, :])   # (B, n, n)
+    n = pids.shape[1]
+    g[:, np.arange(n), np.arange(n)] = 0.0
+    K = -g
+    K[:, np.arange(n), np.arange(n)] = g.sum(axis=2) + u * cat.area[pids]
+    raiz = np.sqrt(cap)
+    S = K / raiz[:, :, None] / raiz[:, None, :]
+    lam, V = np.linalg.eigh(S)
+    return lam, V, raiz
+
+
+def _evolucionar(lam, V, raiz, theta0, t_seg):
+    # θ(t) = C^-1/2 V exp(-Λ t) Vᵀ C^1/2 θ0 ;  t_seg: (B, P)
+    coef = np.einsum('bji,bj->bi', V, raiz * theta0)                   # Vᵀ C^1/2 θ0
+    modos = np.exp(-lam[:, None, :] * t_seg[:, :, None]) * coef[:, None, :]   # (B, P, n)
+    return np.einsum('bij,bpj->bpi', V, modos) / raiz[:, None, :]
+
+
+def simular_bolsas(pids, eids, tids, dists, temp_ambiente=None, u_contacto=U_CONTACTO,
+                   num_points=None, catalogo=None) -> ResultadoBolsas:
+    # pids: (B, n) con n productos por bolsa; eids, tids, dists: (B,)
+    cat = obtener_catalogo() if catalogo is None else catalogo
+    pids = np.atleast_2d(np.asarray(pids, dtype=np.intp))
+    b = pids.shape[0]
+    eids = np.broadcast_to(np.asarray(eids, dtype=np.intp), (b,))
+    tids = np.broadcast_to(np.asarray(tids, dtype=np.intp), (b,))
+    cat.validar_ids(pids.ravel(), eids, tids)
+    dists = np.broadcast_to(np.asarray(dists, dtype=np.float64), (b,))
+    ta = nucleo.TEMP_AMBIENTE if temp_ambiente is None else temp_ambiente
+    ta = np.broadcast_to(np.asarray(ta, dtype=np.float64), (b,))[:, None]
+
+    vel = cat.vel_kmh[tids]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tiempo = dists / vel * 60
+    tiempo = np.where(vel > 0, tiempo, np.where(dists > 0, np.inf, 0.0))
+
+    lam, V, raiz = _descomponer(pids, eids, cat, u_contacto)
+    t0 = cat.temp_std[pids]
+    theta0 = t0 - ta
+    if num_points:
+        tiempos = np.linspace(0, tiempo, num_points, axis=1)             # (B, P)
+    else:
+        tiempos = tiempo[:, None]
+    with np.errstate(invalid='ignore'):
+        theta = _evolucionar(lam, V, raiz, theta0, tiempos * 60)
+    temps = theta + ta[:, None, :]
+    res = ResultadoBolsas(pids, tiempo, t0, temps[:, -1, :])
+    if num_points:
+        res.tiempos, res.perfil = tiempos, temps
+    return res
+
+
+def simular_bolsas_mixtas(bolsas, **kwargs) -> list:
+    # bolsas: lista de (pids, eid, tid, dist) con distinta cantidad de productos.
+    # Agrupa por tamaño para resolver cada grupo en una sola operación.
+    grupos = {}
+    for i, (pids, eid, tid, dist) in enumerate(bolsas):
+        grupos.setdefault(len(pids), []).append(i)
+    salida = [None] * len(bolsas)
+    for idx in grupos.values():
+        res = simular_bolsas([bolsas[i][0] for i in idx], [bolsas[i][1] for i in idx],
+                             [bolsas[i][2] for i in idx], [bolsas[i][3] for i in idx], **kwargs)
+        for j, i in enumerate(idx):
+            salida[i] = res.temp_final[j]
+    return salida
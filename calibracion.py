@@ -0,0 +1,180 @@
+import os
+import sys
+from bisect import bisect_right
+from dataclasses import dataclass
+
+# -----------------------------
+# Nivel 1.c: Calibration híbrido
+# -----------------------------
+# Corrige la temperatura física con el residuo medio (medida - predicha) observado en
+# datos históricos. Los residuos se agregan por (producto, empaque, transporte,
+# tramo de distancia) y por claves más gruesas; al corregir se usa la clave más
+# específica que tenga suficientes muestras:
+#   (p, e, t, tramo) -> (p, e, t) -> (p, e) -> (p) -> global
+# Las claves se empaquetan en un int64 (16 bits por campo, 0 = comodín) y se guardan
+# ordenadas junto a las correcciones en float32, así una consulta es una búsqueda
+# binaria y un lote entero se corrige con np.searchsorted. Sin calibración cargada
+# no hace falta NumPy: correct() devuelve 0.0 directamente.
+
+BORDES_DISTANCIA = (1.0, 2.0, 3.0, 5.0, 7.0, 10.0, 15.0)
+MIN_MUESTRAS = 5
+RUTA_POR_DEFECTO = os.environ.get('ACAI_CALIBRACION', 'calibracion.npz')
+
+# Campos que usa cada nivel: producto, empaque, transporte, tramo
+NIVELES = ((True, True, True, True), (True, True, True, False),
+           (True, True, False, False), (True, False, False, False),
+           (False, False, False, False))
+
+
+def _claves(pids, eids, tids, tramos, nivel):
+    import numpy as np
+    usa_p, usa_e, usa_t, usa_b = nivel
+    clave = np.zeros(np.shape(pids), dtype=np.int64)
+    if usa_p:
+        clave |= np.asarray(pids, dtype=np.int64) << 48
+    if usa_e:
+        clave |= np.asarray(eids, dtype=np.int64) << 32
+    if usa_t:
+        clave |= np.asarray(tids, dtype=np.int64) << 16
+    if usa_b:
+        clave |= np.asarray(tramos, dtype=np.int64) + 1
+    return clave
+
+
+def _clave(pid, eid, tid, tramo, nivel):
+    usa_p, usa_e, usa_t, usa_b = nivel
+    return (((pid << 48) if usa_p else 0) | ((eid << 32) if usa_e else 0)
+            | ((tid << 16) if usa_t else 0) | ((tramo + 1) if usa_b else 0))
+
+
+@dataclass
+class Calibration:
+    claves: 'np.ndarray' = ()          # int64 ordenadas (vacía = sin corrección)
+    correcciones: 'np.ndarray' = ()    # float32
+    bordes: tuple = BORDES_DISTANCIA
+
+    def __post_init__(self):
+        self._indice = None
+
+    def __len__(self):
+        return len(self.claves)
+
+    def tramo(self, dist_km):
+        import numpy as np
+        return np.searchsorted(self.bordes, dist_km, side='right')
+
+    def correct(self, food_id:int, pack_id:int, trans_id:int, dist_km:float, temp_phys:float) -> float:
+        if not len(self.claves):
+            return 0.0
+        if self._indice is None:
+            self._indice = dict(zip(self.claves.tolist(), self.correcciones.tolist()))
+        tramo = bisect_right(self.bordes, dist_km) if dist_km is not None else None
+        campos = (food_id, pack_id, trans_id, tramo)
+        for nivel in NIVELES:
+            # Se omiten los niveles que necesitan un dato que no se conoce (None).
+            if any(usa and v is None for usa, v in zip(nivel, campos)):
+                continue
+            corr = self._indice.get(_clave(*(v if usa else 0 for usa, v in zip(nivel, campos)), nivel))
+            if corr is not None:
+                return corr
+        return 0.0
+
+    def correct_batch(self, pids, eids, tids, dists, temps_phys=None) -> 'np.ndarray':
+        import numpy as np
+        n = np.shape(pids)[0]
+        corr = np.zeros(n)
+        if not len(self.claves):
+            return corr
+        tramos = self.tramo(dists)
+        pendiente = np.ones(n, dtype=bool)
+        for nivel in NIVELES:
+            claves = _claves(pids, eids, tids, tramos, nivel)
+            pos = np.searchsorted(self.claves, claves)
+            pos = np.minimum(pos, len(self.claves) - 1)
+            hallado = pendiente & (self.claves[pos] == claves)
+            corr[hallado] = self.correcciones[pos[hallado]]
+            pendiente &= ~hallado
+            if not pendiente.any():
+                break
+        return corr
+
+    @classmethod
+    def fit(cls, pids, eids, tids, dists, temps_predichas, temps_medidas,
+            min_muestras=MIN_MUESTRAS, bordes=BORDES_DISTANCIA) -> 'Calibration':
+        import numpy as np
+        residuo = np.asarray(temps_medidas, dtype=np.float64) - np.asarray(temps_predichas, dtype=np.float64)
+        validos = np.isfinite(residuo)
+        pids, eids, tids = (np.asarray(a)[validos] for a in (pids, eids, tids))
+        dists, residuo = np.asarray(dists, dtype=np.float64)[validos], residuo[validos]
+        tramos = np.searchsorted(bordes, dists, side='right')
+        todas_claves, todas_corr = [], []
+        for nivel in NIVELES:
+            claves, inversa, cuentas = np.unique(_claves(pids, eids, tids, tramos, nivel),
+                                                 return_inverse=True, return_counts=True)
+            medias = np.bincount(inversa, weights=residuo, minlength=len(claves)) / np.maximum(cuentas, 1)
+            minimo = 1 if not any(nivel) else min_muestras
+            sel = cuentas >= minimo
+            todas_claves.append(claves[sel])
+            todas_corr.append(medias[sel])
+        claves = np.concatenate(todas_claves)
+        orden = np.argsort(claves)
+        return cls(claves[orden], np.concatenate(todas_corr)[orden].astype(np.float32), tuple(bordes))
+
+    def save(self, path):
+        import numpy as np
+        np.savez(path, claves=np.asarray(self.claves, dtype=np.int64),
+                 correcciones=np.asarray(self.correcciones, dtype=np.float32), bordes=np.asarray(self.bordes))
+
+    @classmethod
+    def load(cls, path) -> 'Calibration':
+        import numpy as np
+        with np.load(path) as datos:
+            return cls(datos['claves'], datos['correcciones'], tuple(datos['bordes'].tolist()))
+
+
+_CALIBRACION = None
+
+
+def obtener_calibracion() -> Calibration:
+    # Se carga una sola vez por proceso (RUTA_POR_DEFECTO si existe; si no, sin corrección).
+    global _CALIBRACION
+    if _CALIBRACION is None:
+        _CALIBRACION = Calibration.load(RUTA_POR_DEFECTO) if os.path.exists(RUTA_POR_DEFECTO) else Calibration()
+    return _CALIBRACION
+
+
+def cargar_calibracion(path) -> Calibration:
+    global _CALIBRACION
+    _CALIBRACION = Calibration.load(path)
+    return _CALIBRACION
+
+
+def establecer_calibracion(calib: Calibration):
+    global _CALIBRACION
+    _CALIBRACION = calib
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Ajusta la calibración a partir de entregas históricas")
+    parser.add_argument('historial', help="CSV con pid, eid, tid, dist_km, temp_medida y opcionalmente temp_predicha")
+    parser.add_argument('--salida', default=RUTA_POR_DEFECTO)
+    parser.add_argument('--min-muestras', type=int, default=MIN_MUESTRAS)
+    args = parser.parse_args(argv)
+
+    import numpy as np
+    datos = np.genfromtxt(args.historial, delimiter=',', names=True)
+    pids, eids, tids = (datos[c].astype(np.intp) for c in ('pid', 'eid', 'tid'))
+    dists = datos['dist_km']
+    if 'temp_predicha' in datos.dtype.names:
+        predichas = datos['temp_predicha']
+    else:
+        from lote import simular_lote
+        predichas = simular_lote(pids, eids, tids, dists, calibracion=Calibration()).temp_final
+    calib = Calibration.fit(pids, eids, tids, dists, predichas, datos['temp_medida'], args.min_muestras)
+    calib.save(args.salida)
+    print(f"Calibración con {len(calib)} claves guardada en: {args.salida}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,385 @@
+from collections import namedtuple
+
+# -----------------------------
+# Módulo: Datos y Constantes
+# -----------------------------
+DIM_BEBIDA = (0.1, 0.1, 0.2)
+DIM_COMIDA = (0.2, 0.2, 0.1)
+
+PRODUCTOS = {
+    1: {"nombre": "Café", "categoria": "bebida_caliente", "vol_std": 0.3, "temp_std": 85},
+    2: {"nombre": "Té", "categoria": "bebida_caliente", "vol_std": 0.3, "temp_std": 80},
+    3: {"nombre": "Chocolate caliente", "categoria": "bebida_caliente", "vol_std": 0.25, "temp_std": 75},
+    4: {"nombre": "Matcha latte", "categoria": "bebida_caliente", "vol_std": 0.3, "temp_std": 75},
+    5: {"nombre": "Chai", "categoria": "bebida_caliente", "vol_std": 0.3, "temp_std": 78},
+    6: {"nombre": "Refresco", "categoria": "bebida_fria", "vol_std": 0.5, "temp_std": 4},
+    7: {"nombre": "Jugo natural", "categoria": "bebida_fria", "vol_std": 0.4, "temp_std": 6},
+    8: {"nombre": "Agua fría", "categoria": "bebida_fria", "vol_std": 0.5, "temp_std": 7},
+    9: {"nombre": "Smoothie", "categoria": "bebida_fria", "vol_std": 0.35, "temp_std": 5},
+    10: {"nombre": "Limonada", "categoria": "bebida_fria", "vol_std": 0.4, "temp_std": 5},
+    11: {"nombre": "Té helado", "categoria": "bebida_fria", "vol_std": 0.3, "temp_std": 6},
+    12: {"nombre": "Sopa", "categoria": "comida_caliente", "vol_std": 0.5, "temp_std": 80},
+    13: {"nombre": "Pizza", "categoria": "comida_caliente", "masa_std": 0.4, "temp_std": 75},
+    14: {"nombre": "Pasta", "categoria": "comida_caliente", "masa_std": 0.35, "temp_std": 75},
+    15: {"nombre": "Hamburguesa", "categoria": "comida_caliente", "masa_std": 0.3, "temp_std": 70},
+    16: {"nombre": "Arroz con pollo", "categoria": "comida_caliente", "masa_std": 0.45, "temp_std": 75},
+    17: {"nombre": "Helado", "categoria": "comida_fria", "vol_std": 0.15, "temp_std": -6},
+    18: {"nombre": "Ensalada fría", "categoria": "comida_fria", "masa_std": 0.25, "temp_std": 5},
+    19: {"nombre": "Sushi", "categoria": "comida_fria", "masa_std": 0.35, "temp_std": 8},
+    20: {"nombre": "Ensalada de frutas", "categoria": "comida_fria", "vol_std": 0.3, "temp_std": 5},
+}
+
+PROPIEDADES = {
+    "bebida_caliente": {"cp": 4100, "densidad": 1000},
+    "comida_caliente": {"cp": 2500, "densidad": 700},
+    "bebida_fria": {"cp": 4180, "densidad": 1000},
+    "comida_fria": {"cp": 2000, "densidad": 600},
+}
+
+EMPAQUES = {
+    1: {"nombre": "Simple sin aislamiento", "u_val": 15},
+    2: {"nombre": "Contenedor estándar", "u_val": 10},
+    3: {"nombre": "Bolsa térmica básica", "u_val": 7},
+    4: {"nombre": "Bolsa térmica premium", "u_val": 4},
+    5: {"nombre": "Vaso térmico", "u_val": 3},
+}
+
+TRANSPORTES = {
+    1: {"nombre": "Moto/Scooter", "vel_kmh": 40},
+    2: {"nombre": "Automóvil", "vel_kmh": 50},
+    3: {"nombre": "Bicicleta", "vel_kmh": 15},
+    4: {"nombre": "A pie", "vel_kmh": 5},
+}
+
+# -----------------------------
+# Módulo: Catálogo compilado
+# -----------------------------
+# Convierte las tablas anteriores en arreglos densos indexados por ID una sola vez.
+# Las rutas de simulación leen de aquí en lugar de recorrer los diccionarios en
+# cada llamada. Los cambios en tiempo de ejecución se aplican con los métodos
+# actualizar_* (o sincronizar() si se editaron los diccionarios directamente),
+# que recalculan solo las filas/columnas afectadas.
+
+Propiedad = namedtuple('Propiedad', ['cp', 'densidad'])
+FilaProducto = namedtuple('FilaProducto', ['nombre', 'categoria', 'temp_std', 'vol', 'masa',
+                                           'cp', 'dens', 'dims', 'area', 'temp_crit'])
+FilaEmpaque = namedtuple('FilaEmpaque', ['nombre', 'u_val'])
+FilaTransporte = namedtuple('FilaTransporte', ['nombre', 'vel_kmh'])
+
+
+# Arreglos densos: se construyen la primera vez que se usan (y recién ahí se importa
+# NumPy), así las consultas escalares por diccionario no pagan ese costo.
+ARREGLOS = ('masa', 'cp', 'dens', 'dims', 'area', 'temp_std', 'temp_crit', 'caliente', 'fria',
+            'producto_valido', 'u_val', 'empaque_valido', 'vel_kmh', 'transporte_valido', 'k')
+
+
+def _crecer(arr, n, relleno):
+    import numpy as np
+    if arr.shape[0] >= n:
+        return arr
+    nuevo = np.full((n,) + arr.shape[1:], relleno, dtype=arr.dtype)
+    nuevo[:arr.shape[0]] = arr
+    return nuevo
+
+
+class Catalogo:
+    def __init__(self, productos=None, propiedades=None, empaques=None, transportes=None,
+                 dim_bebida=None, dim_comida=None):
+        self.fuente_productos = PRODUCTOS if productos is None else productos
+        self.fuente_propiedades = PROPIEDADES if propiedades is None else propiedades
+        self.fuente_empaques = EMPAQUES if empaques is None else empaques
+        self.fuente_transportes = TRANSPORTES if transportes is None else transportes
+        self.dim_bebida = DIM_BEBIDA if dim_bebida is None else dim_bebida
+        self.dim_comida = DIM_COMIDA if dim_comida is None else dim_comida
+        self.compilar()
+
+    def __getattr__(self, nombre):
+        # Solo se llama cuando el atributo no existe: primer acceso a un arreglo.
+        if nombre in ARREGLOS and not self.__dict__.get('con_arreglos', False):
+            self.compilar_arreglos()
+            return getattr(self, nombre)
+        raise AttributeError(nombre)
+
+    # --- Compilación completa ---
+    def compilar(self):
+        for nombre in ARREGLOS:
+            self.__dict__.pop(nombre, None)
+        self.con_arreglos = False
+        self.propiedades = {}
+        self.productos, self.empaques, self.transportes = {}, {}, {}
+        self._inst_propiedades, self._inst_productos = {}, {}
+        self._inst_empaques, self._inst_transportes = {}, {}
+
+        for cat in self.fuente_propiedades:
+            self._compilar_propiedad(cat)
+        for pid in self.fuente_productos:
+            self._compilar_producto(pid)
+        for eid in self.fuente_empaques:
+            self._compilar_empaque(eid)
+        for tid in self.fuente_transportes:
+            self._compilar_transporte(tid)
+        self._recalcular_extremos()
+
+    def compilar_arreglos(self):
+        import numpy as np
+        n_p = max(self.productos, default=0) + 1
+        self.masa = np.full(n_p, np.nan)
+        self.cp = np.full(n_p, np.nan)
+        self.dens = np.full(n_p, np.nan)
+        self.dims = np.full((n_p, 3), np.nan)
+        self.area = np.full(n_p, np.nan)
+        self.temp_std = np.full(n_p, np.nan)
+        self.temp_crit = np.full(n_p, np.nan)
+        self.caliente = np.zeros(n_p, dtype=bool)
+        self.fria = np.zeros(n_p, dtype=bool)
+        self.producto_valido = np.zeros(n_p, dtype=bool)
+
+        n_e = max(self.empaques, default=0) + 1
+        self.u_val = np.full(n_e, np.nan)
+        self.empaque_valido = np.zeros(n_e, dtype=bool)
+
+        n_t = max(self.transportes, default=0) + 1
+        self.vel_kmh = np.full(n_t, np.nan)
+        self.transporte_valido = np.zeros(n_t, dtype=bool)
+
+        self.con_arreglos = True
+        for pid in self.productos:
+            self._arreglo_producto(pid)
+        for eid in self.empaques:
+            self._arreglo_empaque(eid)
+        for tid in self.transportes:
+            self._arreglo_transporte(tid)
+
+        # Matriz (producto x empaque) de constantes k = U·A/(m·cp)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.k = (self.u_val[None, :] * self.area[:, None]) / (self.masa * self.cp)[:, None]
+        self.k[(self.masa == 0) | (self.cp == 0), :] = np.inf
+        self.k[~self.producto_valido, :] = np.nan
+        self.k[:, ~self.empaque_valido] = np.nan
+
+    def _compilar_propiedad(self, cat):
+        p = self.fuente_propiedades[cat]
+        self.propiedades[cat] = Propiedad(p['cp'], p['densidad'])
+        self._inst_propiedades[cat] = dict(p)
+
+    def _compilar_producto(self, pid):
+        info = self.fuente_productos[pid]
+        cat = info['categoria']
+        cp, dens = self.propiedades[cat]
+        vol, masa = info.get('vol_std'), info.get('masa_std')
+        # Misma regla que Food.__post_init__
+        if masa is None:
+            masa = dens * vol * 0.001 if vol else 1.0
+        dims = self.dim_bebida if 'bebida' in cat else self.dim_comida
+        l, w, h = dims
+        area = 2 * (l*w + l*h + w*h)
+        temp_crit = 60.0 if 'caliente' in cat else 10.0
+        self.productos[pid] = FilaProducto(info['nombre'], cat, info['temp_std'], vol, masa,
+                                           cp, dens, dims, area, temp_crit)
+        self._inst_productos[pid] = dict(info)
+        if self.con_arreglos:
+            self._arreglo_producto(pid)
+
+    def _arreglo_producto(self, pid):
+        fila = self.productos[pid]
+        self._asegurar_productos(pid + 1)
+        self.masa[pid], self.cp[pid], self.dens[pid] = fila.masa, fila.cp, fila.dens
+        self.dims[pid] = fila.dims
+        self.area[pid] = fila.area
+        self.temp_std[pid] = fila.temp_std
+        self.temp_crit[pid] = fila.temp_crit
+        self.caliente[pid] = 'caliente' in fila.categoria
+        self.fria[pid] = 'fria' in fila.categoria
+        self.producto_valido[pid] = True
+
+    def _compilar_empaque(self, eid):
+        info = self.fuente_empaques[eid]
+        self.empaques[eid] = FilaEmpaque(info['nombre'], info['u_val'])
+        self._inst_empaques[eid] = dict(info)
+        if self.con_arreglos:
+            self._arreglo_empaque(eid)
+
+    def _arreglo_empaque(self, eid):
+        self._asegurar_empaques(eid + 1)
+        self.u_val[eid] = self.empaques[eid].u_val
+        self.empaque_valido[eid] = True
+
+    def _compilar_transporte(self, tid):
+        info = self.fuente_transportes[tid]
+        self.transportes[tid] = FilaTransporte(info['nombre'], info['vel_kmh'])
+        self._inst_transportes[tid] = dict(info)
+        if self.con_arreglos:
+            self._arreglo_transporte(tid)
+
+    def _arreglo_transporte(self, tid):
+        self.vel_kmh = _crecer(self.vel_kmh, tid + 1, float('nan'))
+        self.transporte_valido = _crecer(self.transporte_valido, tid + 1, False)
+        self.vel_kmh[tid] = self.transportes[tid].vel_kmh
+        self.transporte_valido[tid] = True
+
+    def _asegurar_productos(self, n):
+        if self.masa.shape[0] >= n:
+            return
+        for nombre in ('masa', 'cp', 'dens', 'dims', 'area', 'temp_std', 'temp_crit'):
+            setattr(self, nombre, _crecer(getattr(self, nombre), n, float('nan')))
+        for nombre in ('caliente', 'fria', 'producto_valido'):
+            setattr(self, nombre, _crecer(getattr(self, nombre), n, False))
+        if 'k' in self.__dict__:
+            self.k = _crecer(self.k, n, float('nan'))
+
+    def _asegurar_empaques(self, n):
+        if self.u_val.shape[0] >= n:
+            return
+        self.u_val = _crecer(self.u_val, n, float('nan'))
+        self.empaque_valido = _crecer(self.empaque_valido, n, False)
+        if 'k' in self.__dict__:
+            self.k = _crecer(self.k.T, n, float('nan')).T.copy()
+
+    def _recalcular_fila_k(self, pid):
+        if not self.con_arreglos:
+            return
+        import numpy as np
+        if not self.producto_valido[pid]:
+            self.k[pid, :] = np.nan
+            return
+        m, cp = self.masa[pid], self.cp[pid]
+        if m == 0 or cp == 0:
+            self.k[pid, :] = np.inf
+        else:
+            self.k[pid, :] = (self.u_val * self.area[pid]) / (m * cp)
+        self.k[pid, ~self.empaque_valido] = np.nan
+
+    def _recalcular_columna_k(self, eid):
+        if not self.con_arreglos:
+            return
+        import numpy as np
+        if not self.empaque_valido[eid]:
+            self.k[:, eid] = np.nan
+            return
+        with np.errstate(divide='ignore', invalid='ignore'):
+            col = (self.u_val[eid] * self.area) / (self.masa * self.cp)
+        col[(self.masa == 0) | (self.cp == 0)] = np.inf
+        col[~self.producto_valido] = np.nan
+        self.k[:, eid] = col
+
+    def _recalcular_extremos(self):
+        # Mismos criterios que analysis_report
+        max_vel = 0
+        for fila in self.transportes.values():
+            if fila.vel_kmh > max_vel:
+                max_vel = fila.vel_kmh
+        self.vel_max = max_vel if max_vel != 0 else 50.0
+        self.u_min = min((fila.u_val for fila in self.empaques.values()), default=None)
+
+    # --- Actualización incremental ---
+    def actualizar_producto(self, pid, info=None):
+        if info is not None:
+            self.fuente_productos[pid] = info
+        if pid in self.fuente_productos:
+            self._compilar_producto(pid)
+        elif pid in self.productos:
+            del self.productos[pid], self._inst_productos[pid]
+            if self.con_arreglos:
+                self.producto_valido[pid] = False
+                for nombre in ('masa', 'cp', 'dens', 'dims', 'area', 'temp_std', 'temp_crit'):
+                    getattr(self, nombre)[pid] = float('nan')
+                self.caliente[pid] = self.fria[pid] = False
+        else:
+            return
+        self._recalcular_fila_k(pid)
+
+    def actualizar_empaque(self, eid, info=None):
+        if info is not None:
+            self.fuente_empaques[eid] = info
+        if eid in self.fuente_empaques:
+            self._compilar_empaque(eid)
+        elif eid in self.empaques:
+            del self.empaques[eid], self._inst_empaques[eid]
+            if self.con_arreglos:
+                self.u_val[eid] = float('nan')
+                self.empaque_valido[eid] = False
+        else:
+            return
+        self._recalcular_columna_k(eid)
+        self._recalcular_extremos()
+
+    def actualizar_transporte(self, tid, info=None):
+        if info is not None:
+            self.fuente_transportes[tid] = info
+        if tid in self.fuente_transportes:
+            self._compilar_transporte(tid)
+        elif tid in self.transportes:
+            del self.transportes[tid], self._inst_transportes[tid]
+            if self.con_arreglos:
+                self.vel_kmh[tid] = float('nan')
+                self.transporte_valido[tid] = False
+        else:
+            return
+        self._recalcular_extremos()
+
+    def actualizar_propiedades(self, categoria, props=None):
+        if props is not None:
+            self.fuente_propiedades[categoria] = props
+        self._compilar_propiedad(categoria)
+        for pid, fila in list(self.productos.items()):
+            if fila.categoria == categoria:
+                self._compilar_producto(pid)
+                self._recalcular_fila_k(pid)
+
+    def sincronizar(self) -> bool:
+        # Detecta ediciones hechas directamente sobre los diccionarios fuente.
+        cambios = False
+        for cat in set(self.fuente_propiedades) | set(self._inst_propiedades):
+            if self.fuente_propiedades.get(cat) != self._inst_propiedades.get(cat):
+                if cat not in self.fuente_propiedades:
+                    self.compilar()
+                    return True
+                self.actualizar_propiedades(cat)
+                cambios = True
+        pares = ((self.fuente_productos, self._inst_productos, self.actualizar_producto),
+                 (self.fuente_empaques, self._inst_empaques, self.actualizar_empaque),
+                 (self.fuente_transportes, self._inst_transportes, self.actualizar_transporte))
+        for fuente, instantanea, actualizar in pares:
+            for i in set(fuente) | set(instantanea):
+                if fuente.get(i) != instantanea.get(i):
+                    actualizar(i)
+                    cambios = True
+        return cambios
+
+    # --- Consultas ---
+    def validar_ids(self, pids=None, eids=None, tids=None):
+        import numpy as np
+        res = []
+        for ids, valido, nombre in ((pids, self.producto_valido, "Producto"),
+                                    (eids, self.empaque_valido, "Empaque"),
+                                    (tids, self.transporte_valido, "Transporte")):
+            if ids is None:
+                continue
+            ids = np.asarray(ids)
+            if ids.dtype.kind == 'f':
+                # Sin esto, 13.7 se truncaría en silencio a 13.
+                enteros = np.isfinite(ids) & (ids == np.floor(ids))
+                if not enteros.all():
+                    raise ValueError(f"{nombre}: el ID debe ser entero, hay {ids[~enteros].flat[0]}")
+            ids = ids.astype(np.intp, copy=False)
+            fuera = (ids < 0) | (ids >= len(valido))
+            malos = fuera | ~valido[np.where(fuera, 0, ids)]
+            if malos.any():
+                raise KeyError(f"{nombre} desconocido: {int(ids[malos][0])}")
+            res.append(ids)
+        return res[0] if len(res) == 1 else tuple(res)
+
+
+_CATALOGO = None
+
+
+def obtener_catalogo() -> Catalogo:
+    global _CATALOGO
+    if _CATALOGO is None:
+        _CATALOGO = Catalogo()
+    return _CATALOGO
+
+
+def establecer_catalogo(cat: Catalogo):
+    global _CATALOGO
+    _CATALOGO = cat
@@ -0,0 +1,167 @@
+from dataclasses import dataclass
+import numpy as np
+
+import nucleo
+from catalogo import obtener_catalogo
+from lote import simular_lote
+
+# -----------------------------
+# Nivel 2.j: Conducción interna 1-D (alimentos gruesos)
+# -----------------------------
+# El modelo concentrado de DeliverySim supone temperatura uniforme. Este modo opcional
+# trata cada producto como una placa que pierde calor por ambas caras: se resuelve media
+# placa, con simetría en el núcleo y convección en la superficie, discretizada en `nodos`
+# puntos. El espesor es el del producto, no el del empaque: masa/(ρ·largo·ancho), con el
+# alto del empaque como tope (una pizza de 0.4 kg mide ~1.4 cm, no los 10 cm de
+# DIM_COMIDA). El coeficiente de superficie h = k·ρ·cp·(espesor/2) queda así del orden de
+# U y hace que, con conductividad alta, la temperatura media siga exactamente el
+# decaimiento de Newton con el mismo k del catálogo.
+#
+# Euler implícito (incondicionalmente estable) con el algoritmo de Thomas: la matriz
+# tridiagonal de cada pedido es constante en el tiempo, así que se factoriza una vez y
+# cada paso solo hace dos barridos vectorizados sobre todos los pedidos del lote.
+# Las historias de núcleo y superficie usan la misma grilla que temperature_profile:
+# np.linspace(0, tiempo_min, num_points).
+
+NODOS = 21
+PASOS_POR_PUNTO = 4     # pasos implícitos entre dos puntos de la historia
+BLOQUE = 4096           # pedidos por bloque en el avance temporal
+
+# Conductividad térmica efectiva (W/m·K) por categoría, sin convección interna.
+CONDUCTIVIDAD = {
+    "bebida_caliente": 0.67,
+    "bebida_fria": 0.57,
+    "comida_caliente": 0.45,
+    "comida_fria": 0.50,
+}
+
+
+def espesor_placa(masa, dens, dims):
+    # dims: (..., 3) largo, ancho y alto del empaque, en m.
+    dims = np.asarray(dims, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        espesor = np.asarray(masa, dtype=np.float64) / (np.asarray(dens, dtype=np.float64)
+                                                         * dims[..., 0] * dims[..., 1])
+    return np.fmin(espesor, dims[..., 2])
+
+
+@dataclass
+class ResultadoConduccion:
+    tiempos: np.ndarray     # (N, num_points) minutos
+    centro: np.ndarray      # (N, num_points) °C
+    superficie: np.ndarray  # (N, num_points) °C
+    media: np.ndarray       # (N, num_points) °C, promedio en el espesor
+    biot: np.ndarray        # (N,) h·(espesor/2)/conductividad
+
+    def __len__(self):
+        return len(self.tiempos)
+
+    def perfil(self, i, posicion='centro'):
+        # (tiempos, temps) del pedido i, como DeliverySim.temperature_profile.
+        return self.tiempos[i], getattr(self, posicion)[i]
+
+
+def _avanzar(theta, a, inv_m, c_p, pesos, num_points, pasos_por_punto, centro, superficie, media):
+    # Pasos de Euler implícito: barrido hacia adelante y sustitución hacia atrás, en el lugar.
+    nodos = len(theta)
+    d = np.empty_like(theta)
+    tmp = np.empty_like(theta[0])
+
+    def guardar(j):
+        centro[:, j] = theta[0]
+        superficie[:, j] = theta[-1]
+        media[:, j] = pesos @ theta
+
+    guardar(0)
+    for j in range(1, num_points):
+        for _ in range(pasos_por_punto):
+            np.multiply(theta[0], inv_m[0], out=d[0])
+            for i in range(1, nodos):
+                np.multiply(a[i], d[i - 1], out=tmp)
+                np.subtract(theta[i], tmp, out=d[i])
+                d[i] *= inv_m[i]
+            theta[-1] = d[-1]
+            for i in range(nodos - 2, -1, -1):
+                np.multiply(c_p[i], theta[i + 1], out=tmp)
+                np.subtract(d[i], tmp, out=theta[i])
+        guardar(j)
+
+
+def conduccion_lote(k, temp_inicial, tiempo_min, espesor, conductividad, dens, cp,
+                    temp_ambiente=None, num_points=50, nodos=NODOS,
+                    pasos_por_punto=PASOS_POR_PUNTO) -> ResultadoConduccion:
+    if temp_ambiente is None:
+        temp_ambiente = nucleo.TEMP_AMBIENTE
+    if nodos < 2:
+        raise ValueError("Se necesitan al menos 2 nodos.")
+    k, temp_inicial, tiempo_min, espesor, conductividad, dens, cp, ta = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in
+          (k, temp_inicial, tiempo_min, espesor, conductividad, dens, cp, temp_ambiente)))
+    n = k.shape[0]
+    valido = np.isfinite(k) & np.isfinite(tiempo_min) & (conductividad > 0) & (dens * cp > 0)
+    tiempo = np.where(valido, tiempo_min, 0.0)
+    # Misma grilla que temperature_profile; con tiempo_min = inf el primer punto sigue siendo 0.
+    with np.errstate(invalid='ignore'):
+        tiempos = np.linspace(0.0, tiempo_min, num_points, axis=1)
+    tiempos[:, 0] = 0.0
+
+    rho_cp = np.where(valido, dens * cp, 1.0)
+    mitad = espesor / 2
+    dx = mitad / (nodos - 1)
+    h = np.where(valido, k, 0.0) * rho_cp * mitad
+    dt = tiempo * 60 / max(num_points - 1, 1) / pasos_por_punto
+    r = np.where(valido, conductividad, 1.0) / rho_cp * dt / dx ** 2
+    beta = 2 * h * dt / (rho_cp * dx)
+
+    # Tridiagonal (nodos, N): a (inferior), b (diagonal), c (superior); en θ = T - Ta.
+    a = np.broadcast_to(-r, (nodos, n)).copy()
+    b = np.broadcast_to(1 + 2 * r, (nodos, n)).copy()
+    c = a.copy()
+    c[0] = -2 * r           # simetría en el núcleo (nodo fantasma T[-1] = T[1])
+    a[-1] = -2 * r          # media celda en la superficie
+    b[-1] += beta
+    # Factorización de Thomas: c' y 1/m por nodo, una sola vez.
+    c_p = np.empty_like(c)
+    inv_m = np.empty_like(b)
+    inv_m[0] = 1 / b[0]
+    c_p[0] = c[0] * inv_m[0]
+    for i in range(1, nodos):
+        inv_m[i] = 1 / (b[i] - a[i] * c_p[i - 1])
+        c_p[i] = c[i] * inv_m[i]
+
+    pesos = np.full(nodos, 1.0)
+    pesos[[0, -1]] = 0.5
+    pesos /= pesos.sum()
+    centro = np.empty((n, num_points))
+    superficie = np.empty((n, num_points))
+    media = np.empty((n, num_points))
+    theta0 = temp_inicial - ta
+    # Por bloques de pedidos para que el estado quede en caché durante todos los pasos.
+    for ini in range(0, n, BLOQUE):
+        sl = slice(ini, min(ini + BLOQUE, n))
+        _avanzar(np.broadcast_to(theta0[sl], (nodos, sl.stop - ini)).copy(), a[:, sl].copy(),
+                 inv_m[:, sl].copy(), c_p[:, sl].copy(), pesos, num_points, pasos_por_punto,
+                 centro[sl], superficie[sl], media[sl])
+
+    invalido = ~valido[:, None]
+    ta_col = ta[:, None]
+    centro = np.where(invalido, np.nan, centro + ta_col)
+    superficie = np.where(invalido, np.nan, superficie + ta_col)
+    media = np.where(invalido, np.nan, media + ta_col)
+    biot = np.where(valido, h * mitad / np.where(valido, conductividad, 1.0), np.nan)
+    return ResultadoConduccion(tiempos, centro, superficie, media, biot)
+
+
+def simular_conduccion(pids, eids, tids, dists, num_points=50, catalogo=None, temp_ambiente=None,
+                       nodos=NODOS, pasos_por_punto=PASOS_POR_PUNTO, conductividad=None) -> ResultadoConduccion:
+    # conductividad: {categoría: W/m·K} para reemplazar valores de CONDUCTIVIDAD.
+    cat = obtener_catalogo() if catalogo is None else catalogo
+    res = simular_lote(pids, eids, tids, dists, catalogo=cat, temp_ambiente=temp_ambiente)
+    tabla = {**CONDUCTIVIDAD, **(conductividad or {})}
+    por_id = np.full(len(cat.producto_valido), np.nan)
+    for pid, fila in cat.productos.items():
+        por_id[pid] = tabla.get(fila.categoria, np.nan)
+    pids = res.pid
+    return conduccion_lote(res.k, cat.temp_std[pids], res.tiempo_min, espesor_placa(cat.masa[pids], cat.dens[pids], cat.dims[pids]),
+                           por_id[pids], cat.dens[pids], cat.cp[pids], res.temp_ambiente,
+                           num_points, nodos, pasos_por_punto)
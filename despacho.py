@@ -0,0 +1,211 @@
+import math
+import time
+from dataclasses import dataclass
+import numpy as np
+
+import nucleo
+from catalogo import obtener_catalogo
+from calibracion import obtener_calibracion
+from lote import tiempo_hasta_temp
+from nucleo import puntajes_satisfaccion
+
+# -----------------------------
+# Nivel 2.g: Despacho con varias paradas
+# -----------------------------
+# Un repartidor sale de la cocina (nodo 0) con n pedidos y visita una parada por
+# pedido. Se busca el orden de paradas que:
+#   1) minimiza las paradas que llegan después de su tiempo crítico (critical_time), y
+#   2) maximiza la suma de índices de satisfacción de analysis_report
+#      (desempate: suma del puntaje combinado).
+# Cada pedido se evalúa como DeliverySim con tiempo_min = minuto de llegada y
+# dist_km = distancia directa desde la cocina (el desvío penaliza el puntaje de tiempo).
+#
+# Búsqueda: solución inicial voraz + mejora local (mover/intercambiar paradas) y luego
+# ramificación y poda en profundidad. El estado de un prefijo (minuto, violaciones,
+# puntajes) se calcula una sola vez y lo comparten todas sus extensiones; cada hijo
+# solo agrega un tramo. La cota usa que el índice nunca mejora al llegar más tarde.
+# Si se agota el presupuesto se devuelve la mejor ruta encontrada (optimo=False).
+
+PRESUPUESTO_S = 0.5
+ESPERA_MIN = 0.0    # minutos de entrega en cada parada
+
+
+@dataclass
+class PlanRuta:
+    orden: list             # índices de pedido en orden de visita
+    llegada_min: list       # minuto de llegada a cada parada (mismo orden)
+    temp_final: list
+    temp_corrected: list
+    indice: list
+    tiempo_critico: list
+    violaciones: int        # paradas que llegan después de su tiempo crítico
+    puntaje_total: int      # suma de índices
+    optimo: bool            # True si la búsqueda terminó dentro del presupuesto
+    nodos: int
+
+    def __len__(self):
+        return len(self.orden)
+
+
+class _Pedidos:
+    # Datos escalares por pedido, precalculados una vez para la búsqueda.
+    def __init__(self, pedidos, distancias, tid, temp_ambiente, espera_min, cat, calib):
+        pids = np.array([p for p, _ in pedidos], dtype=np.intp)
+        eids = np.array([e for _, e in pedidos], dtype=np.intp)
+        pids, eids = cat.validar_ids(pids, eids)
+        cat.validar_ids(tids=[tid])
+        d = np.asarray(distancias, dtype=np.float64)
+        n = len(pedidos)
+        if d.shape != (n + 1, n + 1):
+            raise ValueError(f"La matriz de distancias debe ser ({n + 1}, {n + 1}) con la cocina en el índice 0.")
+
+        self.n = n
+        self.ta = nucleo.TEMP_AMBIENTE if temp_ambiente is None else temp_ambiente
+        vel = cat.transportes[tid].vel_kmh
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tramo = d / vel * 60 if vel > 0 else np.where(d > 0, np.inf, 0.0)
+        # tramo[a][b]: minutos del nodo a al nodo b (los pedidos son los nodos 1..n)
+        self.tramo = tramo.tolist()
+        self.espera = espera_min
+        entrada = np.where(np.eye(n + 1, dtype=bool), np.inf, tramo)
+        self.min_entrada = entrada[:, 1:].min(axis=0).tolist()   # cota inferior de cada tramo de llegada
+
+        self.dist = d[0, 1:].tolist()
+        self.k = cat.k[pids, eids].tolist()
+        self.t0 = cat.temp_std[pids].tolist()
+        self.corr = calib.correct_batch(pids, eids, np.full(n, tid), d[0, 1:]).tolist()
+        self.critico = tiempo_hasta_temp(cat.k[pids, eids], cat.temp_std[pids], cat.temp_crit[pids],
+                                         cat.caliente[pids], cat.fria[pids], self.ta).tolist()
+        self.categoria = [cat.productos[p].categoria for p in pids.tolist()]
+        self.nombre = [cat.productos[p].nombre for p in pids.tolist()]
+        self.transporte = cat.transportes[tid].nombre
+        self.vel_max = cat.vel_max
+
+    def evaluar(self, j, t):
+        # (índice, combinado, tarde, temp_final, temp_corrected) del pedido j al llegar en el minuto t
+        k, ta = self.k[j], self.ta
+        if math.isfinite(k):
+            temp = ta + (self.t0[j] - ta) * math.exp(-k * (t * 60))
+        else:
+            temp = ta
+        corr = temp + self.corr[j]
+        ind, _, _, comb = puntajes_satisfaccion(self.categoria[j], self.nombre[j], self.transporte,
+                                                self.t0[j], corr, self.dist[j], t, self.vel_max)
+        return ind, comb, t > self.critico[j], temp, corr
+
+    def recorrer(self, orden):
+        # Evalúa una ruta completa: (clave, llegadas, evaluaciones)
+        pos, t = 0, 0.0
+        viol, suma, comb = 0, 0, 0.0
+        llegadas, evs = [], []
+        for j in orden:
+            t += self.tramo[pos][j + 1]
+            ev = self.evaluar(j, t)
+            viol += ev[2]
+            suma += ev[0]
+            comb += ev[1]
+            llegadas.append(t)
+            evs.append(ev)
+            t += self.espera
+            pos = j + 1
+        return (-viol, suma, comb), llegadas, evs
+
+
+def _voraz(ped):
+    # Siguiente parada: la de menor holgura hasta su tiempo crítico; si ya no llega a
+    # ninguna a tiempo, la más cercana.
+    restantes, orden = set(range(ped.n)), []
+    pos, t = 0, 0.0
+    while restantes:
+        def clave(j):
+            llegada = t + ped.tramo[pos][j + 1]
+            holgura = ped.critico[j] - llegada
+            return (holgura < 0, holgura if math.isfinite(holgura) else math.inf, llegada)
+        j = min(restantes, key=clave)
+        t += ped.tramo[pos][j + 1] + ped.espera
+        pos = j + 1
+        orden.append(j)
+        restantes.remove(j)
+    return orden
+
+
+def _mejora_local(ped, orden, clave, limite):
+    # Mover una parada a otra posición o intercambiar dos, mientras mejore.
+    mejoro = True
+    while mejoro and time.perf_counter() < limite:
+        mejoro = False
+        n = len(orden)
+        for a in range(n):
+            for b in range(n):
+                if a == b:
+                    continue
+                movida = orden[:a] + orden[a + 1:]
+                movida.insert(b, orden[a])
+                cambio = orden[:]
+                cambio[a], cambio[b] = cambio[b], cambio[a]
+                for cand in (movida, cambio):
+                    c = ped.recorrer(cand)[0]
+                    if c > clave:
+                        orden, clave, mejoro = cand, c, True
+    return orden, clave
+
+
+def planificar_ruta(pedidos, distancias, tid, temp_ambiente=None, espera_min=ESPERA_MIN,
+                    presupuesto_s=PRESUPUESTO_S, catalogo=None, calibracion=None) -> PlanRuta:
+    # pedidos: lista de (pid, eid); distancias: matriz (n+1, n+1) en km con la cocina en 0.
+    cat = obtener_catalogo() if catalogo is None else catalogo
+    calib = obtener_calibracion() if calibracion is None else calibracion
+    ped = _Pedidos(pedidos, distancias, tid, temp_ambiente, espera_min, cat, calib)
+    n = ped.n
+    limite = time.perf_counter() + presupuesto_s
+
+    mejor = _voraz(ped)
+    mejor, mejor_clave = _mejora_local(ped, mejor, ped.recorrer(mejor)[0], limite)
+    nodos = 0
+    agotado = False
+    camino = []
+
+    def buscar(pos, t, viol, suma, comb, restantes):
+        nonlocal mejor, mejor_clave, nodos, agotado
+        nodos += 1
+        if not restantes:
+            if (-viol, suma, comb) > mejor_clave:
+                mejor, mejor_clave = camino[:], (-viol, suma, comb)
+            return
+        if nodos & 255 == 0 and time.perf_counter() > limite:
+            agotado = True
+            return
+
+        hijos = []
+        viol_min, suma_max, comb_max = viol, suma, comb
+        for j in restantes:
+            tj = t + ped.tramo[pos][j + 1]
+            ev = ped.evaluar(j, tj)
+            hijos.append((ped.critico[j] - tj, tj, j, ev))
+            # Cota: j no puede llegar antes que t + su tramo de entrada más corto.
+            t_min = t + ped.min_entrada[j]
+            cota = ev if t_min >= tj else ped.evaluar(j, t_min)
+            viol_min += cota[2]
+            suma_max += cota[0]
+            comb_max += cota[1]
+        if (-viol_min, suma_max, comb_max) <= mejor_clave:
+            return
+
+        hijos.sort(key=lambda h: (h[3][2], h[0]))
+        for _, tj, j, ev in hijos:
+            camino.append(j)
+            restantes.remove(j)
+            buscar(j + 1, tj + ped.espera, viol + ev[2], suma + ev[0], comb + ev[1], restantes)
+            restantes.add(j)
+            camino.pop()
+            if agotado:
+                return
+
+    if n and time.perf_counter() < limite:
+        buscar(0, 0.0, 0, 0, 0.0, set(range(n)))
+    else:
+        agotado = n > 0
+
+    clave, llegadas, evs = ped.recorrer(mejor)
+    return PlanRuta(mejor, llegadas, [e[3] for e in evs], [e[4] for e in evs], [e[0] for e in evs],
+                    [ped.critico[j] for j in mejor], -clave[0], clave[1], not agotado, nodos)
@@ -0,0 +1,149 @@
+from dataclasses import dataclass, fields
+import numpy as np
+
+from catalogo import Catalogo, obtener_catalogo
+from calibracion import obtener_calibracion
+from lote import ResultadoLote, simular_lote, evaluar_lote
+
+# -----------------------------
+# Nivel 2.h: Escenarios "qué pasa si"
+# -----------------------------
+# Guarda un lote base (pedidos, resultados e índices) y responde preguntas como
+# "¿y si el empaque 3 tuviera U=5?" o "¿y si hiciera 35 °C?". Los cambios se aplican
+# sobre una copia del catálogo (el global no se toca) y solo se recalculan los pedidos
+# cuyo producto, empaque o transporte depende del parámetro cambiado; el resto conserva
+# su resultado base. La temperatura ambiente, o una velocidad que cambie la velocidad
+# máxima del catálogo (referencia del puntaje de tiempo), afectan a todos los pedidos.
+#
+#   esc = Escenarios(pids, eids, tids, dists)
+#   dif = esc.que_pasa_si(empaques={3: {'u_val': 5}})
+#   dif.resumen()
+
+
+@dataclass
+class DiferenciaEscenario:
+    filas: np.ndarray           # posiciones (en el lote base) de los pedidos recalculados
+    base: ResultadoLote         # resultados base de esas filas
+    nuevo: ResultadoLote        # resultados del escenario para esas filas
+    indice_base: np.ndarray
+    indice_nuevo: np.ndarray
+    catalogo: Catalogo          # catálogo con los cambios aplicados
+
+    def __len__(self):
+        return len(self.filas)
+
+    @property
+    def delta_temp(self) -> np.ndarray:
+        return self.nuevo.temp_corrected - self.base.temp_corrected
+
+    @property
+    def delta_indice(self) -> np.ndarray:
+        return self.indice_nuevo - self.indice_base
+
+    def cambiados(self) -> np.ndarray:
+        # Filas (del lote base) cuyo índice o temperatura corregida cambió.
+        m = (self.delta_indice != 0) | (self.nuevo.temp_corrected != self.base.temp_corrected)
+        return self.filas[m]
+
+    def resumen(self) -> dict:
+        d = self.delta_indice
+        tarde_base = self.base.tiempo_min > self.base.tiempo_critico
+        tarde_nuevo = self.nuevo.tiempo_min > self.nuevo.tiempo_critico
+        return {
+            'recalculados': len(self),
+            'cambian_indice': int((d != 0).sum()),
+            'mejoran': int((d > 0).sum()),
+            'empeoran': int((d < 0).sum()),
+            'delta_indice_medio': float(d.mean()) if len(self) else 0.0,
+            'delta_temp_media': float(self.delta_temp.mean()) if len(self) else 0.0,
+            'nuevos_fuera_de_tiempo': int((tarde_nuevo & ~tarde_base).sum()),
+            'recuperados': int((tarde_base & ~tarde_nuevo).sum()),
+        }
+
+
+def _subconjunto(res, filas):
+    n = len(res)
+    valores = {}
+    for f in fields(ResultadoLote):
+        v = getattr(res, f.name)
+        valores[f.name] = v[filas] if np.ndim(v) and len(v) == n else v
+    return ResultadoLote(**valores)
+
+
+def _mezclar(fuente, cambios):
+    # Cada cambio se combina con la entrada existente ({'u_val': 5} conserva el nombre).
+    nueva = dict(fuente)
+    for i, c in (cambios or {}).items():
+        nueva[i] = {**fuente.get(i, {}), **c}
+    return nueva
+
+
+class Escenarios:
+    def __init__(self, pids, eids, tids, dists, temp_ambiente=None, catalogo=None, calibracion=None):
+        self.cat = obtener_catalogo() if catalogo is None else catalogo
+        self.calib = obtener_calibracion() if calibracion is None else calibracion
+        self.base = simular_lote(pids, eids, tids, dists, catalogo=self.cat,
+                                 temp_ambiente=temp_ambiente, calibracion=self.calib)
+        self.indice = evaluar_lote(self.base, catalogo=self.cat).indice
+        self._grupos = {}
+
+    def __len__(self):
+        return len(self.base)
+
+    def _filas_de(self, columna, ids):
+        # Índice invertido id -> filas, construido una vez por columna.
+        if columna not in self._grupos:
+            valores = getattr(self.base, columna)
+            orden = np.argsort(valores, kind='stable')
+            unicos, inicios = np.unique(valores[orden], return_index=True)
+            self._grupos[columna] = dict(zip(unicos.tolist(), np.split(orden, inicios[1:])))
+        grupos = self._grupos[columna]
+        return [grupos[i] for i in ids if i in grupos]
+
+    def catalogo_con(self, productos=None, propiedades=None, empaques=None, transportes=None) -> Catalogo:
+        cat = self.cat
+        return Catalogo(_mezclar(cat.fuente_productos, productos),
+                        _mezclar(cat.fuente_propiedades, propiedades),
+                        _mezclar(cat.fuente_empaques, empaques),
+                        _mezclar(cat.fuente_transportes, transportes),
+                        cat.dim_bebida, cat.dim_comida)
+
+    def filas_afectadas(self, nuevo, productos=None, propiedades=None, empaques=None,
+                        transportes=None, temp_ambiente=None) -> np.ndarray:
+        if temp_ambiente is not None or nuevo.vel_max != self.cat.vel_max:
+            return np.arange(len(self.base))
+        pids = set(productos or ())
+        if propiedades:
+            pids |= {p for p, fila in self.cat.productos.items() if fila.categoria in propiedades}
+        partes = (self._filas_de('pid', pids) + self._filas_de('eid', empaques or ())
+                  + self._filas_de('tid', transportes or ()))
+        if not partes:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(np.concatenate(partes))
+
+    def que_pasa_si(self, productos=None, propiedades=None, empaques=None, transportes=None,
+                    temp_ambiente=None) -> DiferenciaEscenario:
+        # productos/empaques/transportes: {id: {campo: valor}}; propiedades: {categoría: {...}};
+        # temp_ambiente: nueva temperatura ambiente para todos los pedidos.
+        nuevo = self.catalogo_con(productos, propiedades, empaques, transportes)
+        filas = self.filas_afectadas(nuevo, productos, propiedades, empaques, transportes, temp_ambiente)
+        base = _subconjunto(self.base, filas)
+        ta = base.temp_ambiente if temp_ambiente is None else temp_ambiente
+        res = simular_lote(base.pid, base.eid, base.tid, base.dist_km, catalogo=nuevo,
+                           temp_ambiente=ta, calibracion=self.calib)
+        indice = evaluar_lote(res, catalogo=nuevo).indice
+        return DiferenciaEscenario(filas, base, res, self.indice[filas], indice, nuevo)
+
+    def combinar(self, dif) -> ResultadoLote:
+        # Resultado completo del escenario: el lote base con las filas recalculadas.
+        n = len(self.base)
+        valores = {}
+        for f in fields(ResultadoLote):
+            v, nv = getattr(self.base, f.name), getattr(dif.nuevo, f.name)
+            if np.ndim(v) and len(v) == n:
+                v = v.copy()
+                v[dif.filas] = nv
+            elif len(dif) == n:
+                v = nv
+            valores[f.name] = v
+        return ResultadoLote(**valores)
@@ -0,0 +1,243 @@
+import csv
+import itertools
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+
+from lote import simular_lote
+
+# -----------------------------
+# Nivel 2.b: Procesamiento por flujo (sin interacción)
+# -----------------------------
+# Lee pedidos de un CSV/JSONL (o stdin) en bloques de tamaño fijo, los simula con
+# simular_lote y escribe los resultados bloque a bloque. La memoria usada depende
+# del tamaño de bloque, no del tamaño del archivo.
+
+TAM_BLOQUE = 100_000
+COLUMNAS_ENTRADA = ('pid', 'eid', 'tid', 'dist_km')
+ALIAS_ENTRADA = {'dist': 'dist_km'}
+COLUMNAS_SALIDA = ('pid', 'eid', 'tid', 'dist_km', 'k', 'tiempo_min',
+                   'temp_final', 'temp_corrected', 'tiempo_critico')
+DTYPE_SALIDA = np.dtype([('pid', '<i4'), ('eid', '<i4'), ('tid', '<i4'), ('dist_km', '<f8'),
+                         ('k', '<f8'), ('tiempo_min', '<f8'), ('temp_final', '<f8'),
+                         ('temp_corrected', '<f8'), ('tiempo_critico', '<f8')])
+FORMATOS = ('csv', 'jsonl', 'npy', 'almacen')
+
+
+def inferir_formato(ruta, formato=None, defecto='csv'):
+    if formato:
+        return formato
+    if ruta in (None, '-'):
+        return defecto
+    ext = os.path.splitext(ruta)[1].lower().lstrip('.')
+    if ext == 'json':
+        ext = 'jsonl'
+    if ext not in FORMATOS:
+        raise ValueError(f"No se reconoce el formato de '{ruta}'. Use --formato-entrada/--formato-salida.")
+    return ext
+
+
+def _a_arreglos(filas, lineas):
+    # lineas: número de línea de cada fila en la entrada, para los mensajes de error.
+    try:
+        datos = np.array(filas, dtype=np.float64).reshape(-1, 4)
+    except (ValueError, TypeError):
+        for fila, n in zip(filas, lineas):
+            try:
+                [float(v) for v in fila]
+            except (ValueError, TypeError):
+                raise ValueError(f"Línea {n}: se esperaban valores numéricos, hay {fila}") from None
+        raise
+    ids, dist = datos[:, :3], datos[:, 3]
+    with np.errstate(invalid='ignore'):
+        ids_malos = ~(np.isfinite(ids) & (ids == np.floor(ids))).all(axis=1)
+        dist_mala = ~(np.isfinite(dist) & (dist >= 0))
+    if ids_malos.any() or dist_mala.any():
+        i = int(np.argmax(ids_malos | dist_mala))
+        if ids_malos[i]:
+            raise ValueError(f"Línea {lineas[i]}: pid, eid y tid deben ser enteros, hay {filas[i][:3]}")
+        raise ValueError(f"Línea {lineas[i]}: la distancia debe ser un número >= 0, hay {filas[i][3]}")
+    return (datos[:, 0].astype(np.intp), datos[:, 1].astype(np.intp),
+            datos[:, 2].astype(np.intp), datos[:, 3])
+
+
+def _bloques_csv(f, tam_bloque):
+    lector = csv.reader(f)
+    cabecera = next(lector, None)
+    if cabecera is None:
+        return  # entrada vacía: no hay pedidos
+    cabecera = [ALIAS_ENTRADA.get(c.strip(), c.strip()) for c in cabecera]
+    try:
+        idx = [cabecera.index(c) for c in COLUMNAS_ENTRADA]
+    except ValueError:
+        raise ValueError(f"El CSV debe tener las columnas {', '.join(COLUMNAS_ENTRADA)}") from None
+    minimo = max(idx) + 1
+    while True:
+        filas, lineas = [], []
+        for fila in itertools.islice(lector, tam_bloque):
+            if not fila:
+                continue
+            if len(fila) < minimo:
+                raise ValueError(f"Línea {lector.line_num}: se esperaban {len(cabecera)} columnas, hay {len(fila)}")
+            filas.append([fila[i] for i in idx])
+            lineas.append(lector.line_num)
+        if not filas:
+            return
+        yield _a_arreglos(filas, lineas)
+
+
+def _bloques_jsonl(f, tam_bloque):
+    numeradas = enumerate(f, 1)
+    while True:
+        filas, lineas = [], []
+        for n, linea in itertools.islice(numeradas, tam_bloque):
+            if not linea.strip():
+                continue
+            d = json.loads(linea)
+            for alias, nombre in ALIAS_ENTRADA.items():
+                if alias in d and nombre not in d:
+                    d[nombre] = d[alias]
+            filas.append([d[c] for c in COLUMNAS_ENTRADA])
+            lineas.append(n)
+        if not filas:
+            return
+        yield _a_arreglos(filas, lineas)
+
+
+def leer_pedidos(f, formato='csv', tam_bloque=TAM_BLOQUE):
+    if formato == 'csv':
+        return _bloques_csv(f, tam_bloque)
+    if formato == 'jsonl':
+        return _bloques_jsonl(f, tam_bloque)
+    raise ValueError(f"Formato de entrada no soportado: {formato}")
+
+
+def a_lista_json(arr):
+    # JSON estricto: inf/NaN (p. ej. tiempo_critico de un producto que nunca cruza) van como null.
+    lista = arr.tolist()
+    if np.isfinite(arr).all():
+        return lista
+    return [v if math.isfinite(v) else None for v in lista]
+
+
+# --- Escritores ---
+class EscritorCSV:
+    def __init__(self, f):
+        self.f = f
+        self.f.write(','.join(COLUMNAS_SALIDA) + '\n')
+
+    def escribir(self, res):
+        cols = [getattr(res, c) for c in COLUMNAS_SALIDA]
+        np.savetxt(self.f, np.column_stack(cols), delimiter=',',
+                   fmt=['%d', '%d', '%d'] + ['%.10g'] * 6)
+
+    def cerrar(self):
+        self.f.flush()
+
+
+class EscritorJSONL:
+    def __init__(self, f):
+        self.f = f
+
+    def escribir(self, res):
+        cols = [a_lista_json(getattr(res, c)) for c in COLUMNAS_SALIDA]
+        self.f.writelines(json.dumps(dict(zip(COLUMNAS_SALIDA, fila)), allow_nan=False) + '\n'
+                          for fila in zip(*cols))
+
+    def cerrar(self):
+        self.f.flush()
+
+
+class EscritorNPY:
+    # Escribe un .npy de registros sin conocer el total de filas de antemano:
+    # reserva una cabecera de largo fijo y la reescribe con la forma final al cerrar.
+    LARGO_CABECERA = 256
+
+    def __init__(self, f):
+        if not f.seekable():
+            raise ValueError("La salida NPY debe ser un archivo (no stdout).")
+        self.f = f
+        self.n = 0
+        self.f.write(self._cabecera())
+
+    def _cabecera(self):
+        dic = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+            np.lib.format.dtype_to_descr(DTYPE_SALIDA), self.n)
+        prefijo = b'\x93NUMPY\x01\x00'
+        relleno = self.LARGO_CABECERA - len(prefijo) - 2 - len(dic) - 1
+        return prefijo + (len(dic) + relleno + 1).to_bytes(2, 'little') + (dic + ' ' * relleno + '\n').encode('latin1')
+
+    def escribir(self, res):
+        registros = np.empty(len(res), dtype=DTYPE_SALIDA)
+        for c in COLUMNAS_SALIDA:
+            registros[c] = getattr(res, c)
+        self.f.write(registros.tobytes())
+        self.n += len(res)
+
+    def cerrar(self):
+        self.f.seek(0)
+        self.f.write(self._cabecera())
+        self.f.flush()
+
+
+class EscritorAlmacen:
+    # Agrega cada bloque a un almacén columnar (ver almacen.py); 'f' es el directorio.
+    def __init__(self, f):
+        if not isinstance(f, str) or f == '-':
+            raise ValueError("La salida 'almacen' debe ser un directorio (no stdout).")
+        from almacen import AlmacenResultados
+        self.almacen = AlmacenResultados(f)
+
+    def escribir(self, res):
+        self.almacen.agregar(res)
+
+    def cerrar(self):
+        pass
+
+
+ESCRITORES = {'csv': EscritorCSV, 'jsonl': EscritorJSONL, 'npy': EscritorNPY, 'almacen': EscritorAlmacen}
+
+
+def procesar_flujo(entrada='-', salida='-', tam_bloque=TAM_BLOQUE, formato_entrada=None,
+                   formato_salida=None, progreso=True, dir_graficos=None, procesos=None) -> int:
+    fmt_in = inferir_formato(entrada, formato_entrada)
+    fmt_out = inferir_formato(salida, formato_salida)
+
+    f_in = sys.stdin if entrada == '-' else open(entrada, newline='', encoding='utf-8')
+    if fmt_out == 'almacen':
+        f_out = salida
+    elif salida == '-':
+        f_out = sys.stdout.buffer if fmt_out == 'npy' else sys.stdout
+    else:
+        f_out = open(salida, 'wb') if fmt_out == 'npy' else open(salida, 'w', newline='', encoding='utf-8')
+
+    total = 0
+    inicio = time.perf_counter()
+    try:
+        escritor = ESCRITORES[fmt_out](f_out)
+        for pids, eids, tids, dists in leer_pedidos(f_in, fmt_in, tam_bloque):
+            res = simular_lote(pids, eids, tids, dists)
+            escritor.escribir(res)
+            if dir_graficos:
+                from render import renderizar_lote
+                renderizar_lote(pids, eids, tids, dists, dir_graficos, procesos=procesos, inicio=total)
+            total += len(res)
+            if progreso:
+                seg = time.perf_counter() - inicio
+                print(f"[flujo] {total:,} filas · {total / seg if seg > 0 else 0:,.0f} filas/s",
+                      file=sys.stderr)
+        escritor.cerrar()
+    finally:
+        if f_in is not sys.stdin:
+            f_in.close()
+        if f_out not in (sys.stdout, sys.stdout.buffer) and hasattr(f_out, 'close'):
+            f_out.close()
+
+    if progreso:
+        seg = time.perf_counter() - inicio
+        print(f"[flujo] Completado: {total:,} filas en {seg:.2f} s "
+              f"({total / seg if seg > 0 else 0:,.0f} filas/s)", file=sys.stderr)
+    return total
@@ -0,0 +1,206 @@
+from dataclasses import dataclass
+import numpy as np
+
+import nucleo
+from catalogo import obtener_catalogo
+from calibracion import obtener_calibracion
+
+# -----------------------------
+# Nivel 1.d: Simulación por lotes (vectorizada)
+# -----------------------------
+# Replica procesar_entrega + DeliverySim para arreglos de pedidos, sin construir
+# objetos Food/Packaging/Transporte por pedido. Las fórmulas son las mismas, pero aquí
+# se usa np.exp y en el camino escalar math.exp, que no redondean igual: los resultados
+# difieren en unos pocos ULP (error relativo del orden de 1e-15, siempre < 1e-14), y un
+# índice de satisfacción justo en el límite de redondeo puede diferir en una unidad.
+# `python bench.py --verificar` compara ambos caminos en toda la grilla del catálogo.
+
+@dataclass
+class ResultadoLote:
+    pid: np.ndarray
+    eid: np.ndarray
+    tid: np.ndarray
+    dist_km: np.ndarray
+    k: np.ndarray
+    tiempo_min: np.ndarray
+    temp_final: np.ndarray
+    temp_corrected: np.ndarray
+    tiempo_critico: np.ndarray
+    temp_ambiente: object = None    # escalar o arreglo (N,)
+
+    def __len__(self):
+        return len(self.pid)
+
+
+def decaimiento_newton(k, tiempo_min, temp_inicial, temp_ambiente=None):
+    # Equivalente vectorizado del cálculo de temp_final en DeliverySim.__post_init__.
+    if temp_ambiente is None:
+        temp_ambiente = nucleo.TEMP_AMBIENTE
+    with np.errstate(invalid='ignore', over='ignore'):
+        temp = temp_ambiente + (temp_inicial - temp_ambiente) * np.exp(-k * (tiempo_min * 60))
+    return np.where(np.isfinite(k), temp, temp_ambiente)
+
+
+def tiempo_hasta_temp(k, temp_inicial, target_temp, caliente, fria, temp_ambiente=None):
+    # Equivalente vectorizado de DeliverySim.time_to_temp.
+    if temp_ambiente is None:
+        temp_ambiente = nucleo.TEMP_AMBIENTE
+    k, temp_inicial, target_temp = np.broadcast_arrays(
+        np.asarray(k, dtype=np.float64), np.asarray(temp_inicial, dtype=np.float64),
+        np.asarray(target_temp, dtype=np.float64))
+    ratio = (target_temp - temp_ambiente) / (temp_inicial - temp_ambiente + 1e-9)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_min = -np.log(ratio) / k / 60.0
+    res = np.where(np.isnan(t_min), np.inf, t_min)
+    # Objetivo fuera del intervalo (temp_inicial, ambiente): nunca se alcanza.
+    res = np.where(ratio >= 1, np.inf, res)
+
+    ya_alcanzado = (caliente & (target_temp >= temp_inicial)) | (fria & (target_temp <= temp_inicial))
+    res = np.where(ya_alcanzado, 0.0, res)
+
+    en_ambiente = (np.abs(target_temp - temp_ambiente) < 1e-6) & (np.abs(temp_inicial - temp_ambiente) < 1e-6)
+    res = np.where(ratio <= 0, np.where(en_ambiente, 0.0, np.inf), res)
+
+    k_invalido = (k <= 1e-9) | ~np.isfinite(k)
+    return np.where(k_invalido, np.inf, res)
+
+
+def simular_lote(pids, eids, tids, dists, catalogo=None, temp_ambiente=None,
+                 calibracion=None) -> ResultadoLote:
+    cat = obtener_catalogo() if catalogo is None else catalogo
+    if temp_ambiente is None:
+        temp_ambiente = nucleo.TEMP_AMBIENTE
+    elif np.ndim(temp_ambiente):
+        temp_ambiente = np.asarray(temp_ambiente, dtype=np.float64)
+    pids, eids, tids = cat.validar_ids(pids, eids, tids)
+    dists = np.asarray(dists, dtype=np.float64)
+    malas = ~(dists >= 0)
+    if malas.any():
+        raise ValueError(f"La distancia no puede ser negativa: {dists[malas].flat[0]}")
+
+    k = cat.k[pids, eids]
+
+    vel = cat.vel_kmh[tids]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tiempo = dists / vel * 60
+    tiempo = np.where(vel > 0, tiempo, np.where(dists > 0, np.inf, 0.0))
+
+    temp_inicial = cat.temp_std[pids]
+    temp_final = decaimiento_newton(k, tiempo, temp_inicial, temp_ambiente)
+    calib = obtener_calibracion() if calibracion is None else calibracion
+    temp_corrected = temp_final + calib.correct_batch(pids, eids, tids, dists, temp_final)
+
+    tiempo_critico = tiempo_hasta_temp(k, temp_inicial, cat.temp_crit[pids],
+                                       cat.caliente[pids], cat.fria[pids], temp_ambiente)
+
+    return ResultadoLote(pids, eids, tids, dists, k, tiempo, temp_final, temp_corrected, tiempo_critico,
+                         temp_ambiente)
+
+
+# -----------------------------
+# Nivel 1.f: Evaluación por lotes
+# -----------------------------
+# Mismas reglas por tramos que evaluar_entrega (topes por distancia para A pie y
+# Bicicleta, penalizaciones de tiempo para Helado/Smoothie y comida caliente,
+# pesos 0.65/0.35 escalados a 1-10), aplicadas sobre arreglos.
+
+@dataclass
+class EvaluacionLote:
+    indice: np.ndarray
+    score_temp: np.ndarray
+    score_tiempo: np.ndarray
+    score_combinado: np.ndarray
+    temp_critica: np.ndarray
+    tiempo_critico: np.ndarray
+    temp_objetivo: np.ndarray       # (N, 3): 25/50/75 % de pérdida o ganancia de calor
+    tiempo_objetivo: np.ndarray     # (N, 3), NaN si no aplica
+    temp_aislamiento_ideal: np.ndarray
+
+    def __len__(self):
+        return len(self.indice)
+
+    def comentarios(self):
+        return [nucleo.comentario_satisfaccion(i) for i in self.indice.tolist()]
+
+
+def banderas_nombres(cat):
+    # Tablas por ID de las reglas de evaluar_entrega que dependen del nombre.
+    a_pie = np.zeros(len(cat.transporte_valido), dtype=bool)
+    bicicleta = np.zeros(len(cat.transporte_valido), dtype=bool)
+    for tid, fila in cat.transportes.items():
+        a_pie[tid] = fila.nombre == "A pie"
+        bicicleta[tid] = fila.nombre == "Bicicleta"
+    sensible = np.zeros(len(cat.producto_valido), dtype=bool)
+    for pid, fila in cat.productos.items():
+        sensible[pid] = fila.nombre in ("Helado", "Smoothie")
+    return a_pie, bicicleta, sensible
+
+
+def _recortar_0_1(x):
+    # max(0.0, min(x, 1.0)) de Python convierte NaN en 0.0
+    return np.where(np.isnan(x), 0.0, np.clip(x, 0.0, 1.0))
+
+
+def indice_satisfaccion(temp_inicial, temp_corrected, temp_crit, caliente, dist_km, tiempo_min,
+                        a_pie, bicicleta, sensible, vel_max):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        st_cal = (temp_corrected - temp_crit) / (temp_inicial - temp_crit)
+        st_fri = (temp_crit - temp_corrected) / (temp_crit - temp_inicial)
+    score_temp = np.where(caliente, np.where(temp_inicial <= temp_crit, 0.0, st_cal),
+                          np.where(temp_inicial >= temp_crit, 0.0, st_fri))
+    score_temp = _recortar_0_1(score_temp)
+
+    ideal = (dist_km / vel_max) * 60.0 if vel_max > 0 else np.full_like(dist_km, np.inf)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(dist_km <= 1e-6, 1.0, np.where(ideal <= 1e-6, 100.0, tiempo_min / ideal))
+    st = np.select([ratio <= 1.2, ratio <= 2.5, ratio <= 4.0], [1.0, 0.75, 0.40], 0.10)
+
+    st = np.where(a_pie & (dist_km > 2.0), np.minimum(st, 0.15),
+                  np.where(a_pie & (dist_km > 1.0), np.minimum(st, 0.4), st))
+    st = np.where(bicicleta & (dist_km > 7.0) & caliente, np.minimum(st, 0.3),
+                  np.where(bicicleta & (dist_km > 5.0), np.minimum(st, 0.5), st))
+
+    st = np.where(sensible & (tiempo_min > 20), st * 0.5,
+                  np.where(sensible & (tiempo_min > 15), st * 0.8, st))
+    calor = ~sensible & caliente
+    st = np.where(calor & (tiempo_min > 45), st * 0.7,
+                  np.where(calor & (tiempo_min > 30), st * 0.9, st))
+    score_tiempo = _recortar_0_1(st)
+
+    combinado = (nucleo.PESO_TEMP * score_temp) + (nucleo.PESO_TIEMPO * score_tiempo)
+    indice = np.round(combinado * 9).astype(np.int64) + 1
+    return indice, score_temp, score_tiempo, combinado
+
+
+def evaluar_lote(res: ResultadoLote, catalogo=None) -> EvaluacionLote:
+    cat = obtener_catalogo() if catalogo is None else catalogo
+    temp_ambiente = nucleo.TEMP_AMBIENTE if res.temp_ambiente is None else res.temp_ambiente
+    ta = np.asarray(temp_ambiente, dtype=np.float64)
+    ta_col = ta[:, None] if ta.ndim else ta
+    pids, tids = res.pid, res.tid
+    caliente, fria = cat.caliente[pids], cat.fria[pids]
+    temp_inicial = cat.temp_std[pids]
+    temp_crit = cat.temp_crit[pids]
+    a_pie, bicicleta, sensible = banderas_nombres(cat)
+
+    indice, score_temp, score_tiempo, combinado = indice_satisfaccion(
+        temp_inicial, res.temp_corrected, temp_crit, caliente, res.dist_km, res.tiempo_min,
+        a_pie[tids], bicicleta[tids], sensible[pids], cat.vel_max)
+
+    fracciones = np.array([0.25, 0.50, 0.75])
+    t0 = temp_inicial[:, None]
+    objetivo = np.where(caliente[:, None], t0 - fracciones * (t0 - ta_col),
+                        t0 + fracciones * (ta_col - t0))
+    aplica = (caliente | fria) & (np.abs(temp_inicial - temp_ambiente) > 1e-6)
+    objetivo = np.where(aplica[:, None], objetivo, np.nan)
+    tiempos = tiempo_hasta_temp(res.k[:, None], t0, objetivo, caliente[:, None], fria[:, None], ta_col)
+    tiempos = np.where(aplica[:, None], tiempos, np.nan)
+
+    masa, cp = cat.masa[pids], cat.cp[pids]
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        k_best = (cat.u_min * cat.area[pids]) / (masa * cp)
+        temp_best = temp_ambiente + (temp_inicial - temp_ambiente) * np.exp(-k_best * res.tiempo_min * 60)
+    temp_best = np.where((masa > 0) & (cp > 0), temp_best, np.nan)
+
+    return EvaluacionLote(indice, score_temp, score_tiempo, combinado, temp_crit, res.tiempo_critico,
+                          objetivo, tiempos, temp_best)
@@ -0,0 +1,191 @@
+import functools
+import json
+import os
+import random
+import sys
+import time
+
+# -----------------------------
+# Herramienta: Métricas por etapa
+# -----------------------------
+# Instrumentación opcional de las etapas de la simulación. instrumentar() reemplaza
+# las funciones y métodos de cada etapa por envolturas que cuentan llamadas, tiempo
+# (inclusivo: procesar_entrega incluye __post_init__ y éste a Calibration.correct),
+# una muestra de latencias para percentiles, bloques de memoria netos asignados
+# (sys.getallocatedblocks) y elementos procesados en las etapas por lotes.
+# Sin instrumentar no hay ninguna envoltura, así que el costo es cero.
+# Los modos por lotes (flujo) y servicio pasan por las mismas etapas de lote.
+
+MAX_MUESTRAS = 10_000
+CUANTILES = (0.5, 0.9, 0.99)
+
+# etapa -> (módulo, objeto dentro del módulo o None, atributo)
+ETAPAS = {
+    'procesar_entrega': ('nucleo', None, 'procesar_entrega'),
+    'post_init': ('nucleo', 'DeliverySim', '__post_init__'),
+    'calibracion': ('calibracion', 'Calibration', 'correct'),
+    'evaluar_entrega': ('nucleo', None, 'evaluar_entrega'),
+    'analysis_report': ('nucleo', 'DeliverySim', 'analysis_report'),
+    'generate_image': ('nucleo', 'DeliverySim', 'generate_image'),
+    'plot_temperature_profile': ('nucleo', 'DeliverySim', 'plot_temperature_profile'),
+    'simular_lote': ('lote', None, 'simular_lote'),
+    'calibracion_lote': ('calibracion', 'Calibration', 'correct_batch'),
+    'evaluar_lote': ('lote', None, 'evaluar_lote'),
+    'renderizar_lote': ('render', None, 'renderizar_lote'),
+    'simular_conduccion': ('conduccion', None, 'simular_conduccion'),
+}
+
+
+class Etapa:
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.llamadas = 0
+        self.segundos = 0.0
+        self.bloques = 0
+        self.elementos = 0
+        self.muestras = []
+        self._azar = random.Random(0)
+
+    def registrar(self, seg, bloques, elementos):
+        self.llamadas += 1
+        self.segundos += seg
+        self.bloques += bloques
+        self.elementos += elementos
+        # Muestreo de reservorio: percentiles con memoria acotada.
+        if len(self.muestras) < MAX_MUESTRAS:
+            self.muestras.append(seg)
+        else:
+            i = self._azar.randrange(self.llamadas)
+            if i < MAX_MUESTRAS:
+                self.muestras[i] = seg
+
+    def cuantiles(self):
+        if not self.muestras:
+            return {q: 0.0 for q in CUANTILES}
+        orden = sorted(self.muestras)
+        return {q: orden[min(len(orden) - 1, int(q * len(orden)))] for q in CUANTILES}
+
+    def resumen(self):
+        return {'llamadas': self.llamadas, 'segundos': self.segundos,
+                'cuantiles_s': {str(q): v for q, v in self.cuantiles().items()},
+                'bloques_netos': self.bloques, 'elementos': self.elementos}
+
+
+class Metricas:
+    def __init__(self):
+        self.etapas = {}
+        self._originales = {}   # etapa -> (dueño, atributo, original, envoltura)
+
+    @property
+    def activa(self) -> bool:
+        return bool(self._originales)
+
+    def etapa(self, nombre) -> Etapa:
+        if nombre not in self.etapas:
+            self.etapas[nombre] = Etapa(nombre)
+        return self.etapas[nombre]
+
+    def envolver(self, nombre, fn):
+        etapa = self.etapa(nombre)
+        reloj, bloques = time.perf_counter, sys.getallocatedblocks
+
+        @functools.wraps(fn)
+        def envoltura(*args, **kwargs):
+            b0 = bloques()
+            t0 = reloj()
+            res = fn(*args, **kwargs)
+            seg = reloj() - t0
+            n = len(res) if hasattr(res, '__len__') and not isinstance(res, str) else 1
+            etapa.registrar(seg, bloques() - b0, n)
+            return res
+        return envoltura
+
+    def instrumentar(self, etapas=None):
+        import importlib
+        for nombre in etapas or ETAPAS:
+            if nombre in self._originales:
+                continue
+            modulo, objeto, atributo = ETAPAS[nombre]
+            mod = importlib.import_module(modulo)
+            dueno = getattr(mod, objeto) if objeto else mod
+            original = getattr(dueno, atributo)
+            envoltura = self.envolver(nombre, original)
+            setattr(dueno, atributo, envoltura)
+            if objeto is None:
+                # Módulos que hicieron "from x import f" guardan su propia referencia.
+                _reemplazar_referencias(original, envoltura)
+            self._originales[nombre] = (dueno, atributo, original, envoltura)
+
+    def desinstrumentar(self):
+        for nombre, (dueno, atributo, original, envoltura) in self._originales.items():
+            setattr(dueno, atributo, original)
+            if not isinstance(dueno, type):
+                _reemplazar_referencias(envoltura, original)
+        self._originales.clear()
+
+    def reiniciar(self):
+        # Pone los contadores en cero sin quitar las envolturas.
+        for e in self.etapas.values():
+            e.__init__(e.nombre)
+
+    def a_dict(self) -> dict:
+        return {'etapas': {n: e.resumen() for n, e in self.etapas.items() if e.llamadas}}
+
+    def a_prometheus(self, prefijo='acai') -> str:
+        lineas = []
+        etapas = [e for e in self.etapas.values() if e.llamadas]
+        def serie(metrica, tipo, ayuda, valores):
+            lineas.append(f"# HELP {prefijo}_{metrica} {ayuda}")
+            lineas.append(f"# TYPE {prefijo}_{metrica} {tipo}")
+            lineas.extend(valores)
+        serie('etapa_llamadas_total', 'counter', 'Llamadas por etapa',
+              [f'{prefijo}_etapa_llamadas_total{{etapa="{e.nombre}"}} {e.llamadas}' for e in etapas])
+        valores = []
+        for e in etapas:
+            for q, v in e.cuantiles().items():
+                valores.append(f'{prefijo}_etapa_segundos{{etapa="{e.nombre}",quantile="{q}"}} {v:.9g}')
+            valores.append(f'{prefijo}_etapa_segundos_sum{{etapa="{e.nombre}"}} {e.segundos:.9g}')
+            valores.append(f'{prefijo}_etapa_segundos_count{{etapa="{e.nombre}"}} {e.llamadas}')
+        serie('etapa_segundos', 'summary', 'Latencia por llamada (inclusiva)', valores)
+        serie('etapa_bloques_netos_total', 'counter', 'Bloques de memoria netos asignados por etapa',
+              [f'{prefijo}_etapa_bloques_netos_total{{etapa="{e.nombre}"}} {e.bloques}' for e in etapas])
+        serie('etapa_elementos_total', 'counter', 'Pedidos (o filas) procesados por etapa',
+              [f'{prefijo}_etapa_elementos_total{{etapa="{e.nombre}"}} {e.elementos}' for e in etapas])
+        return '\n'.join(lineas) + '\n'
+
+    def guardar(self, ruta):
+        # .json -> instantánea JSON; cualquier otra extensión -> texto Prometheus.
+        if ruta.lower().endswith('.json'):
+            texto = json.dumps(self.a_dict(), indent=1)
+        else:
+            texto = self.a_prometheus()
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(texto)
+
+
+def _reemplazar_referencias(viejo, nuevo):
+    # Solo se revisan los módulos de este proyecto (mismo directorio).
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    for mod in list(sys.modules.values()):
+        archivo = getattr(mod, '__file__', None)
+        if not archivo or os.path.dirname(os.path.abspath(archivo)) != directorio:
+            continue
+        for nombre, valor in list(vars(mod).items()):
+            if valor is viejo:
+                setattr(mod, nombre, nuevo)
+
+
+_METRICAS = Metricas()
+
+
+def obtener_metricas() -> Metricas:
+    return _METRICAS
+
+
+def instrumentar(etapas=None) -> Metricas:
+    _METRICAS.instrumentar(etapas)
+    return _METRICAS
+
+
+def desinstrumentar():
+    _METRICAS.desinstrumentar()
@@ -0,0 +1,122 @@
+from dataclasses import dataclass, field
+import numpy as np
+
+import nucleo
+from catalogo import obtener_catalogo
+from calibracion import obtener_calibracion
+from lote import decaimiento_newton, tiempo_hasta_temp, indice_satisfaccion, banderas_nombres
+
+# -----------------------------
+# Nivel 2.d: Modo Monte Carlo (incertidumbre)
+# -----------------------------
+# Muestrea la velocidad real (tráfico), la temperatura de servicio y la temperatura
+# ambiente de cada pedido y reporta percentiles de temperatura final, tiempo crítico
+# e índice de satisfacción. Se procesa en bloques de (pedidos x muestras) acotados por
+# max_elementos. Cada pedido y cada variable tienen su propio generador derivado de
+# (semilla, índice del pedido), así el resultado no depende del tamaño de bloque.
+
+MAX_ELEMENTOS = 2_000_000
+
+
+@dataclass
+class Distribucion:
+    tipo: str = 'normal'     # 'normal', 'lognormal' (factor multiplicativo, mediana 1) o 'uniforme'
+    escala: float = 0.0
+
+    def muestrear(self, rng, centro, n):
+        if self.escala == 0:
+            return np.full(n, centro, dtype=np.float64)
+        if self.tipo == 'normal':
+            return centro + self.escala * rng.standard_normal(n)
+        if self.tipo == 'lognormal':
+            return centro * np.exp(self.escala * rng.standard_normal(n))
+        if self.tipo == 'uniforme':
+            return centro + rng.uniform(-self.escala, self.escala, n)
+        raise ValueError(f"Distribución desconocida: {self.tipo}")
+
+
+@dataclass
+class ConfigMC:
+    velocidad: Distribucion = field(default_factory=lambda: Distribucion('lognormal', 0.25))
+    temp_inicial: Distribucion = field(default_factory=lambda: Distribucion('normal', 3.0))
+    temp_ambiente: Distribucion = field(default_factory=lambda: Distribucion('normal', 3.0))
+
+
+@dataclass
+class ResultadoMC:
+    percentiles: tuple
+    temp_final: np.ndarray       # (N, Q)
+    tiempo_critico: np.ndarray   # (N, Q)
+    indice: np.ndarray           # (N, Q)
+    prob_critica: np.ndarray     # (N,) fracción de muestras que llegan fuera de temperatura
+
+    def __len__(self):
+        return len(self.prob_critica)
+
+
+def _generadores(semilla, i):
+    return [np.random.default_rng(np.random.SeedSequence(semilla, spawn_key=(i, j))) for j in range(3)]
+
+
+def simular_incertidumbre(pids, eids, tids, dists, n_muestras=10_000, config=None, semilla=0,
+                          percentiles=(5, 50, 95), temp_ambiente=None, max_elementos=MAX_ELEMENTOS,
+                          catalogo=None, calibracion=None) -> ResultadoMC:
+    cat = obtener_catalogo() if catalogo is None else catalogo
+    calib = obtener_calibracion() if calibracion is None else calibracion
+    config = ConfigMC() if config is None else config
+    pids, eids, tids = cat.validar_ids(pids, eids, tids)
+    dists = np.asarray(dists, dtype=np.float64)
+    ta_media = nucleo.TEMP_AMBIENTE if temp_ambiente is None else temp_ambiente
+    n = len(pids)
+    q = len(percentiles)
+
+    k = cat.k[pids, eids]
+    vel = cat.vel_kmh[tids]
+    t0 = cat.temp_std[pids]
+    crit = cat.temp_crit[pids]
+    caliente, fria = cat.caliente[pids], cat.fria[pids]
+    a_pie, bicicleta, sensible = banderas_nombres(cat)
+    a_pie, bicicleta, sensible = a_pie[tids], bicicleta[tids], sensible[pids]
+    corr = calib.correct_batch(pids, eids, tids, dists)
+
+    res = ResultadoMC(tuple(percentiles), np.empty((n, q)), np.empty((n, q)), np.empty((n, q)), np.empty(n))
+    por_grupo = max(1, max_elementos // max(n_muestras, 1))
+    paso = min(n_muestras, max_elementos)
+
+    for a in range(0, n, por_grupo):
+        g = slice(a, min(a + por_grupo, n))
+        idx = np.arange(g.start, g.stop)
+        m = len(idx)
+        gens = [_generadores(semilla, int(i)) for i in idx]
+        temps = np.empty((m, n_muestras))
+        crits = np.empty((m, n_muestras))
+        indices = np.empty((m, n_muestras), dtype=np.int8)
+        fuera = np.zeros(m)
+        for s0 in range(0, n_muestras, paso):
+            s1 = min(s0 + paso, n_muestras)
+            w = s1 - s0
+            v = np.stack([config.velocidad.muestrear(r[0], vel[i], w) for r, i in zip(gens, idx)])
+            ti = np.stack([config.temp_inicial.muestrear(r[1], t0[i], w) for r, i in zip(gens, idx)])
+            ta = np.stack([config.temp_ambiente.muestrear(r[2], ta_media, w) for r, i in zip(gens, idx)])
+
+            d = dists[g][:, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                tiempo = np.where(v > 0, d / v * 60, np.where(d > 0, np.inf, 0.0))
+            kk = k[g][:, None]
+            tf = decaimiento_newton(kk, tiempo, ti, ta)
+            tc = tf + corr[g][:, None]
+            cal, fr = caliente[g][:, None], fria[g][:, None]
+            tcrit = tiempo_hasta_temp(kk, ti, crit[g][:, None], cal, fr, ta)
+            ind, _, _, _ = indice_satisfaccion(ti, tc, crit[g][:, None], cal, d, tiempo,
+                                               a_pie[g][:, None], bicicleta[g][:, None],
+                                               sensible[g][:, None], cat.vel_max)
+            temps[:, s0:s1] = tf
+            crits[:, s0:s1] = tcrit
+            indices[:, s0:s1] = ind
+            fuera += (tiempo > tcrit).sum(axis=1)
+
+        res.temp_final[g] = np.percentile(temps, percentiles, axis=1, method='nearest').T
+        res.tiempo_critico[g] = np.percentile(crits, percentiles, axis=1, method='nearest').T
+        res.indice[g] = np.percentile(indices, percentiles, axis=1, method='nearest').T
+        res.prob_critica[g] = fuera / n_muestras
+    return res
@@ -0,0 +1,440 @@
+import math
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from catalogo import obtener_catalogo
+from calibracion import obtener_calibracion
+
+# Núcleo liviano: modelo, física y evaluación solo con la biblioteca estándar.
+# NumPy, PIL y matplotlib se importan dentro de las funciones que los usan
+# (perfil, imagen y gráfico), así una simulación escalar arranca rápido.
+
+# -----------------------------
+# Módulo: Datos y Constantes
+# -----------------------------
+TEMP_AMBIENTE = 25.0
+
+# -----------------------------
+# Nivel 3: Modelo de Dominio
+# -----------------------------
+@dataclass
+class Food:
+    id: int
+    nombre: str
+    categoria: str
+    temp_inicial: float
+    vol: float = None
+    masa: float = None
+    cp: float = field(init=False)
+    dens: float = field(init=False)
+
+    def __post_init__(self):
+        self.cp, self.dens = obtener_catalogo().propiedades[self.categoria]
+        if self.masa is None:
+            if self.vol:
+                self.masa = self.dens * self.vol * 0.001 # Asumiendo vol en litros para obtener masa en kg
+            else: # Si no hay vol, asumimos masa unitaria (ej. 1 kg), podría necesitar ajuste
+                self.masa = 1.0
+
+
+@dataclass
+class Packaging:
+    nombre: str
+    u_val: float
+    dims: tuple
+    id: int = None
+
+    def area(self) -> float:
+        l, w, h = self.dims
+        return 2 * (l*w + l*h + w*h)
+
+@dataclass
+class Transporte:
+    nombre: str
+    vel_kmh: float
+    id: int = None
+
+# -----------------------------
+# Nivel 1.a: Formato del resumen
+# -----------------------------
+FUENTES_RESUMEN = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "arial.ttf", 
+    "DejaVuSans.ttf"
+]
+
+ETIQUETAS_RESUMEN = [
+    "Producto             : ",
+    "Transporte           : ",
+    "Distancia (km)       : ",
+    "Tiempo (min)         : ",
+    "Temp inicial         : ",
+    "Temp final física   : ",
+    "Temp final corregida : ",
+]
+
+
+@lru_cache(maxsize=None)
+def cargar_fuente(tam=18):
+    # Se busca y carga una sola vez por proceso y tamaño.
+    from PIL import ImageFont
+    for ruta in FUENTES_RESUMEN:
+        if os.path.exists(ruta):
+            try:
+                return ImageFont.truetype(ruta, tam)
+            except Exception:
+                continue
+    return ImageFont.load_default()
+
+
+def valores_resumen(nombre, transporte, dist_km, tiempo_min, temp_inicial, temp_final, temp_corrected):
+    return [
+        f"{nombre}",
+        f"{transporte}",
+        f"{dist_km:.1f}",
+        f"{tiempo_min:.1f}",
+        f"{temp_inicial:.1f}°C",
+        f"{temp_final:.1f}°C",
+        f"{temp_corrected:.1f}°C",
+    ]
+
+# -----------------------------
+# Nivel 1.b: Simulador físico
+# -----------------------------
+@dataclass
+class DeliverySim:
+    food: Food
+    pack: Packaging
+    tiempo_min: float
+    transporte: Transporte
+    dist_km: float
+    temp_ambiente: float = None
+    k: float = field(init=False)
+    temp_final: float = field(init=False)
+    temp_corrected: float = field(init=False)
+
+    def __post_init__(self):
+        if self.temp_ambiente is None:
+            self.temp_ambiente = TEMP_AMBIENTE
+        A = self.pack.area()
+        if self.food.masa == 0 or self.food.cp == 0:
+            self.k = float('inf') 
+        else:
+            self.k = (self.pack.u_val * A) / (self.food.masa * self.food.cp)
+
+        t = self.tiempo_min * 60
+        
+        if self.k == float('inf'):
+             self.temp_final = self.temp_ambiente
+        elif math.isinf(self.k) or math.isnan(self.k):
+             self.temp_final = self.temp_ambiente
+        else:
+            self.temp_final = self.temp_ambiente + (self.food.temp_inicial - self.temp_ambiente) * math.exp(-self.k * t)
+        
+        corr = obtener_calibracion().correct(self.food.id, self.pack.id, self.transporte.id, self.dist_km, self.temp_final)
+        self.temp_corrected = self.temp_final + corr
+
+    def summary_terminal(self):
+        print("\n--- Resumen de entrega ---")
+        print(f"Producto             : {self.food.nombre}")
+        print(f"Transporte           : {self.transporte.nombre}")
+        print(f"Distancia (km)       : {self.dist_km:.1f}")
+        print(f"Tiempo (min)         : {self.tiempo_min:.1f}")
+        print(f"Temp inicial         : {self.food.temp_inicial:.1f}°C")
+        print(f"Temp final física   : {self.temp_final:.1f}°C")
+        print(f"Temp final corregida : {self.temp_corrected:.1f}°C")
+
+    def summary_values(self):
+        return valores_resumen(self.food.nombre, self.transporte.nombre, self.dist_km, self.tiempo_min,
+                               self.food.temp_inicial, self.temp_final, self.temp_corrected)
+
+    def summary_image(self):
+        from PIL import Image, ImageDraw
+        img = Image.new('RGB', (450, 250), 'white')
+        draw = ImageDraw.Draw(img)
+        font = cargar_fuente(18)
+        lines = [etiqueta + valor for etiqueta, valor in zip(ETIQUETAS_RESUMEN, self.summary_values())]
+        y = 20
+        for line in lines:
+            draw.text((20, y), line, fill='black', font=font)
+            y += 30
+        return img
+
+    def generate_image(self, path='resumen.png'):
+        img = self.summary_image()
+        img.save(path)
+        print(f"Imagen guardada en: {path}")
+        return path
+
+    def plot_temperature_profile(self, num_points=50, path=None, conduccion=False):
+        import matplotlib.pyplot as plt
+        if self.k == float('inf') or math.isinf(self.k) or math.isnan(self.k):
+             print("No se puede generar el perfil de temperatura debido a k inválido (masa/cp podría ser cero).")
+             if path: 
+                try:
+                    fig, ax = plt.subplots(figsize=(6,4))
+                    ax.text(0.5, 0.5, "Error: No se puede graficar el perfil de temperatura.\n(k inválido, posible masa/cp = 0)", 
+                            horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
+                    ax.set_xticks([])
+                    ax.set_yticks([])
+                    plt.title(f"Perfil temperatura: {self.food.nombre} - ERROR")
+                    plt.savefig(path)
+                    plt.close(fig)
+                    print(f"Gráfico de error guardado en: {path}")
+                except Exception as e:
+                    print(f"Error al intentar guardar gráfico de error: {e}")
+             else:
+                 plt.figure(figsize=(6,4))
+                 plt.text(0.5, 0.5, "Error: No se puede graficar el perfil de temperatura.\n(k inválido, posible masa/cp = 0)", 
+                          horizontalalignment='center', verticalalignment='center', transform=plt.gca().transAxes)
+                 plt.xticks([])
+                 plt.yticks([])
+                 plt.title(f"Perfil temperatura: {self.food.nombre} - ERROR")
+                 plt.show()
+             return
+
+        tiempos, temps = self.temperature_profile(num_points)
+        
+        plt.figure(figsize=(6,4))
+        plt.plot(tiempos, temps, marker='o', linestyle='-', label='Concentrado')
+        if conduccion:
+            _, centro, superficie = self.conduction_profile(num_points)
+            plt.plot(tiempos, centro, linestyle='--', label='Núcleo (conducción)')
+            plt.plot(tiempos, superficie, linestyle=':', label='Superficie (conducción)')
+            plt.legend()
+        plt.title(f"Perfil temperatura: {self.food.nombre}")
+        plt.xlabel('Tiempo (min)')
+        plt.ylabel('Temperatura (°C)')
+        plt.grid(True)
+        if path:
+            plt.savefig(path)
+            plt.close()
+            print(f"Gráfico guardado en: {path}")
+        else:
+            plt.show()
+
+    def temperature_profile(self, num_points=50):
+        import numpy as np
+        tiempos = np.linspace(0, self.tiempo_min, num_points)
+        # math.exp, igual que __post_init__: el último punto es exactamente temp_final.
+        ta, dif = self.temp_ambiente, self.food.temp_inicial - self.temp_ambiente
+        temps = np.array([ta + dif * math.exp(-self.k * (t * 60)) for t in tiempos.tolist()])
+        return tiempos, temps
+
+    def conduction_profile(self, num_points=50):
+        # Modelo 1-D opcional (conduccion.py): historias de núcleo y superficie en la misma
+        # grilla que temperature_profile.
+        from conduccion import CONDUCTIVIDAD, conduccion_lote, espesor_placa
+        espesor = espesor_placa(self.food.masa, self.food.dens, self.pack.dims)
+        res = conduccion_lote(self.k, self.food.temp_inicial, self.tiempo_min, espesor,
+                              CONDUCTIVIDAD.get(self.food.categoria, float('nan')), self.food.dens,
+                              self.food.cp, self.temp_ambiente, num_points)
+        return res.tiempos[0], res.centro[0], res.superficie[0]
+
+    def time_to_temp(self, target_temp: float) -> float:
+        if self.k <= 1e-9 or math.isinf(self.k) or math.isnan(self.k):
+             return float('inf') 
+
+        temp_diff_ratio_arg = (target_temp - self.temp_ambiente) / (self.food.temp_inicial - self.temp_ambiente + 1e-9)
+
+        if temp_diff_ratio_arg <= 0: 
+            if abs(target_temp - self.temp_ambiente) < 1e-6 : 
+                if abs(self.food.temp_inicial - self.temp_ambiente) < 1e-6: return 0.0 
+                else: return float('inf') 
+            return float('inf')
+
+        if ('caliente' in self.food.categoria and target_temp >= self.food.temp_inicial) or \
+           ('fria' in self.food.categoria and target_temp <= self.food.temp_inicial) :
+            return 0.0
+
+        # El objetivo no está entre temp_inicial y la ambiente: el producto se aleja de él.
+        if temp_diff_ratio_arg >= 1:
+            return float('inf')
+        
+        try:
+            t_sec = -math.log(temp_diff_ratio_arg) / self.k
+        except (ValueError,RuntimeWarning):
+            return float('inf')
+            
+        return t_sec / 60.0
+
+    def critical_time(self) -> float:
+        crit_t = 60.0 if 'caliente' in self.food.categoria else 10.0
+        return self.time_to_temp(crit_t)
+
+    def analysis_report(self):
+        print("\n--- Análisis de resultados ---")
+        ev = evaluar_entrega(self)
+        
+        print(f"Índice de satisfacción (1-10): {ev.indice} - {ev.comentario}")
+        print(f"  (Debug: TempScore={ev.score_temp:.2f}, TimeScore={ev.score_tiempo:.2f}, Combined={ev.score_combinado:.2f})")
+
+        print(f"Tiempo crítico (hasta {ev.temp_critica}°C): {ev.tiempo_critico:.1f} min")
+        
+        if not ev.objetivos and ('caliente' in self.food.categoria or 'fria' in self.food.categoria):
+            print("La temperatura inicial es igual a la temperatura ambiente, no se calcula pérdida/ganancia de calor.")
+
+        for etiqueta, tgt_temp, tt in ev.objetivos:
+            print(f"Tiempo hasta {etiqueta} ({tgt_temp:.1f}°C): {tt:.1f} min")
+
+        if ev.temp_aislamiento_ideal is not None:
+            print(f"Temp final con aislamiento ideal (U={ev.u_ideal}): {ev.temp_aislamiento_ideal:.1f}°C")
+        else:
+            print(f"No se puede calcular Temp final con aislamiento ideal debido a masa/cp del producto.")
+
+
+# -----------------------------
+# Nivel 1.f: Evaluación de la entrega
+# -----------------------------
+PESO_TEMP, PESO_TIEMPO = 0.65, 0.35
+
+
+@dataclass
+class Evaluacion:
+    indice: int
+    comentario: str
+    score_temp: float
+    score_tiempo: float
+    score_combinado: float
+    temp_critica: float
+    tiempo_critico: float
+    objetivos: list          # [(etiqueta, temp objetivo, minutos)]
+    u_ideal: float
+    temp_aislamiento_ideal: float = None
+
+
+def comentario_satisfaccion(score_scaled: int) -> str:
+    if score_scaled <= 3:
+        return "Insatisfactorio (temperatura o tiempo deficientes)"
+    elif score_scaled <= 6:
+        return "Puede mejorar (aspectos de temperatura y/o tiempo son aceptables)"
+    elif score_scaled <= 8:
+        return "Buen nivel de conservación y tiempo de entrega"
+    return "Excelente conservación y tiempo de entrega óptimo"
+
+
+def puntajes_satisfaccion(categoria, nombre, transporte, temp_inicial, temp_corrected,
+                          dist_km, tiempo_min, max_vel_kmh):
+    # Índice 1-10 y puntajes parciales de evaluar_entrega, sin construir DeliverySim.
+    crit_temp = 60.0 if 'caliente' in categoria else 10.0
+    initial_temp = temp_inicial
+    corrected_temp = temp_corrected
+    score_temp_0_1 = 0.0
+
+    if 'caliente' in categoria:
+        if initial_temp <= crit_temp: 
+            score_temp_0_1 = 0.0
+        else: 
+            if (initial_temp - crit_temp) == 0: 
+                score_temp_0_1 = 0.0 if corrected_temp < initial_temp else 1.0
+            else:
+                score_temp_0_1 = (corrected_temp - crit_temp) / (initial_temp - crit_temp)
+    else: 
+        if initial_temp >= crit_temp: 
+            score_temp_0_1 = 0.0
+        else: 
+            if (crit_temp - initial_temp) == 0: 
+                 score_temp_0_1 = 0.0 if corrected_temp > initial_temp else 1.0
+            else:
+                score_temp_0_1 = (crit_temp - corrected_temp) / (crit_temp - initial_temp)
+    
+    score_temp_0_1 = max(0.0, min(score_temp_0_1, 1.0))
+
+    ideal_time_for_dist = (dist_km / max_vel_kmh) * 60.0 if max_vel_kmh > 0 else float('inf')
+    
+    time_ratio = 1.0
+    if dist_km <= 1e-6 : 
+        time_ratio = 1.0 
+    elif ideal_time_for_dist <= 1e-6: 
+        time_ratio = 100.0 
+    else:
+        time_ratio = tiempo_min / ideal_time_for_dist
+
+    score_time_0_1 = 0.0
+    if time_ratio <= 1.2:
+        score_time_0_1 = 1.0
+    elif time_ratio <= 2.5:
+        score_time_0_1 = 0.75
+    elif time_ratio <= 4.0:
+        score_time_0_1 = 0.40 
+    else:
+        score_time_0_1 = 0.10 
+
+    if transporte == "A pie":
+        if dist_km > 2.0: score_time_0_1 = min(score_time_0_1, 0.15)
+        elif dist_km > 1.0: score_time_0_1 = min(score_time_0_1, 0.4)
+    elif transporte == "Bicicleta":
+        if dist_km > 7.0 and "caliente" in categoria : score_time_0_1 = min(score_time_0_1, 0.3)
+        elif dist_km > 5.0 : score_time_0_1 = min(score_time_0_1, 0.5)
+    
+    if "Helado" == nombre or "Smoothie" == nombre: 
+        if tiempo_min > 20: score_time_0_1 *= 0.5 
+        elif tiempo_min > 15: score_time_0_1 *= 0.8
+    elif "caliente" in categoria:
+        if tiempo_min > 45: score_time_0_1 *= 0.7
+        elif tiempo_min > 30: score_time_0_1 *= 0.9
+        
+    score_time_0_1 = max(0.0, min(score_time_0_1, 1.0))
+
+    combined_score_0_1 = (PESO_TEMP * score_temp_0_1) + (PESO_TIEMPO * score_time_0_1)
+    score_scaled = int(round(combined_score_0_1 * 9)) + 1
+    return score_scaled, score_temp_0_1, score_time_0_1, combined_score_0_1
+
+
+def evaluar_entrega(sim: DeliverySim) -> Evaluacion:
+    crit_temp = 60.0 if 'caliente' in sim.food.categoria else 10.0
+    cat = obtener_catalogo()
+    score_scaled, score_temp_0_1, score_time_0_1, combined_score_0_1 = puntajes_satisfaccion(
+        sim.food.categoria, sim.food.nombre, sim.transporte.nombre, sim.food.temp_inicial,
+        sim.temp_corrected, sim.dist_km, sim.tiempo_min, cat.vel_max)
+    
+    ta = sim.temp_ambiente
+    objetivos = []
+    if 'caliente' in sim.food.categoria:
+        if abs(sim.food.temp_inicial - ta) > 1e-6 : # Evitar división por cero o resultados extraños si temp_inicial == TEMP_AMBIENTE
+            targets = [sim.food.temp_inicial - 0.25 * (sim.food.temp_inicial - ta), 
+                       sim.food.temp_inicial - 0.50 * (sim.food.temp_inicial - ta),
+                       sim.food.temp_inicial - 0.75 * (sim.food.temp_inicial - ta)]
+            labels = ["25% pérdida calor", "50% pérdida calor", "75% pérdida calor"]
+            objetivos = [(l, t, sim.time_to_temp(t)) for l, t in zip(labels, targets)]
+    elif 'fria' in sim.food.categoria:
+        if abs(ta - sim.food.temp_inicial) > 1e-6:
+            targets = [sim.food.temp_inicial + 0.25 * (ta - sim.food.temp_inicial), 
+                       sim.food.temp_inicial + 0.50 * (ta - sim.food.temp_inicial),
+                       sim.food.temp_inicial + 0.75 * (ta - sim.food.temp_inicial)]
+            labels = ["25% ganancia calor", "50% ganancia calor", "75% ganancia calor"]
+            objetivos = [(l, t, sim.time_to_temp(t)) for l, t in zip(labels, targets)]
+
+    best_u = cat.u_min
+    area = sim.pack.area()
+    temp_best = None
+    if sim.food.masa > 0 and sim.food.cp > 0 :
+        k_best = (best_u * area) / (sim.food.masa * sim.food.cp)
+        temp_best = ta + (sim.food.temp_inicial - ta) * math.exp(-k_best * sim.tiempo_min * 60)
+
+    return Evaluacion(score_scaled, comentario_satisfaccion(score_scaled), score_temp_0_1, score_time_0_1,
+                      combined_score_0_1, crit_temp, sim.critical_time(), objetivos, best_u, temp_best)
+
+
+# Nivel 2: Controlador
+def procesar_entrega(pid:int, eid:int, tid:int, dist:float, temp_ambiente:float=None) -> DeliverySim:
+    cat = obtener_catalogo()
+    info = cat.productos[pid]
+    
+    food = Food(pid, info.nombre, info.categoria, info.temp_std, 
+                vol=info.vol, masa=info.masa)
+
+    emp = cat.empaques[eid]
+    pack = Packaging(emp.nombre, emp.u_val, info.dims, eid)
+    tr = cat.transportes[tid]
+    transporte = Transporte(tr.nombre, tr.vel_kmh, tid)
+    
+    tiempo = 0.0
+    if transporte.vel_kmh > 0:
+        tiempo = dist / transporte.vel_kmh * 60 
+    elif dist > 0: 
+        tiempo = float('inf')
+        print("Advertencia: El transporte tiene velocidad 0 km/h pero la distancia es > 0.")
+
+    return DeliverySim(food, pack, tiempo, transporte, dist, temp_ambiente)
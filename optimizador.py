@@ -0,0 +1,155 @@
+import math
+from collections import namedtuple
+from dataclasses import dataclass
+import numpy as np
+
+import nucleo
+from catalogo import obtener_catalogo
+
+# -----------------------------
+# Nivel 2.c: Optimizador de empaque y transporte
+# -----------------------------
+# Para cada pedido busca la combinación (empaque, transporte) de menor costo que
+# mantiene el alimento del lado correcto de la temperatura crítica de
+# DeliverySim.critical_time. Invierte la solución cerrada de Newton:
+#   T(t) cruza T_crit cuando k·t = L,  L = ln((T0 - Ta) / (T_crit - Ta))
+# así que una opción es factible si k·t <= L, sin construir DeliverySim.
+
+
+@dataclass
+class Eleccion:
+    eid: np.ndarray
+    tid: np.ndarray
+    costo: np.ndarray
+    margen_temp: np.ndarray     # °C por encima (caliente) o por debajo (frío) de T_crit al llegar
+    holgura_min: np.ndarray     # minutos que sobran hasta el tiempo crítico
+    factible: np.ndarray        # False: ninguna opción cumple; se devuelve la de mayor margen
+
+    def __len__(self):
+        return len(self.eid)
+
+
+EleccionPedido = namedtuple('EleccionPedido', ['costo', 'eid', 'tid', 'margen_temp', 'holgura_min', 'factible'])
+
+
+def limite_kt(temp_inicial, temp_crit, caliente, temp_ambiente):
+    # Máximo k·t (en segundos·1/s) antes de cruzar la temperatura crítica.
+    signo = np.where(caliente, 1.0, -1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = (temp_crit - temp_ambiente) / (temp_inicial - temp_ambiente)
+        lim = -np.log(ratio)
+    # ratio <= 0: el objetivo está del otro lado de la ambiente; ratio > 1: el producto se
+    # aleja del objetivo. En ambos casos nunca se cruza (ratio == 1 es T0 == Tc: límite 0).
+    lim = np.where((ratio <= 0) | (ratio > 1), np.inf, lim)
+    return np.where(signo * (temp_inicial - temp_crit) < 0, -np.inf, lim)
+
+
+def costos_por_defecto(cat):
+    # El empaque con menos aislamiento (U más alto) es el más barato: costo = posición
+    # en el orden de U descendente. Todos los transportes cuestan 0 (desempata el margen).
+    orden = sorted(cat.empaques, key=lambda e: -cat.empaques[e].u_val)
+    return {eid: float(i) for i, eid in enumerate(orden)}, {tid: 0.0 for tid in cat.transportes}
+
+
+class Optimizador:
+    def __init__(self, catalogo=None, costos_empaque=None, costos_transporte=None,
+                 temp_ambiente=None, empaques=None, transportes=None):
+        self.cat = obtener_catalogo() if catalogo is None else catalogo
+        self.temp_ambiente = nucleo.TEMP_AMBIENTE if temp_ambiente is None else temp_ambiente
+        ce, ct = costos_por_defecto(self.cat)
+        ce.update(costos_empaque or {})
+        ct.update(costos_transporte or {})
+        self.eids = np.array(sorted(empaques or self.cat.empaques), dtype=np.intp)
+        self.tids = np.array(sorted(transportes or self.cat.transportes), dtype=np.intp)
+        self.cat.validar_ids(eids=self.eids)
+        self.cat.validar_ids(tids=self.tids)
+        self.costo = np.array([ce[e] for e in self.eids])[:, None] + np.array([ct[t] for t in self.tids])[None, :]
+        self.vel = self.cat.vel_kmh[self.tids]
+        self.limite = limite_kt(self.cat.temp_std, self.cat.temp_crit, self.cat.caliente, self.temp_ambiente)
+
+        # Ruta escalar: candidatos por producto ordenados por costo.
+        self._orden = np.argsort(self.costo, axis=None, kind='stable')
+        self._candidatos = {}
+
+    # --- Lote ---
+    def elegir_lote(self, pids, dists) -> Eleccion:
+        pids = self.cat.validar_ids(pids=pids)
+        dists = np.asarray(dists, dtype=np.float64)
+        ta = self.temp_ambiente
+        k = self.cat.k[pids][:, self.eids]                                   # (N, E)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tiempo = np.where(self.vel > 0, dists[:, None] / self.vel * 60,
+                              np.where(dists[:, None] > 0, np.inf, 0.0))     # (N, T)
+            kt = k[:, :, None] * (tiempo[:, None, :] * 60)                   # (N, E, T)
+        kt = np.where(tiempo[:, None, :] == 0, 0.0, kt)
+        lim = self.limite[pids][:, None, None]
+        factible = kt <= lim
+
+        t0 = self.cat.temp_std[pids][:, None, None]
+        crit = self.cat.temp_crit[pids][:, None, None]
+        signo = np.where(self.cat.caliente[pids], 1.0, -1.0)[:, None, None]
+        with np.errstate(invalid='ignore', over='ignore'):
+            temp = ta + (t0 - ta) * np.exp(-kt)
+            holgura = (lim - kt) / k[:, :, None] / 60.0
+        temp = np.where(np.isfinite(k)[:, :, None], temp, ta)
+        margen = signo * (temp - crit)
+
+        n = len(pids)
+        costo = np.broadcast_to(self.costo, factible.shape).reshape(n, -1)
+        factible = factible.reshape(n, -1)
+        margen_f = margen.reshape(n, -1)
+        mejor_costo = np.where(factible, costo, np.inf).min(axis=1)
+        alguno = np.isfinite(mejor_costo)
+        empate = factible & (costo == mejor_costo[:, None])
+        # Entre las de menor costo gana la de mayor margen; sin opciones factibles, la de mayor margen.
+        clave = np.where(alguno[:, None], np.where(empate, margen_f, -np.inf),
+                         np.nan_to_num(margen_f, nan=-np.inf))
+        idx = np.argmax(clave, axis=1)
+        ie, it = np.divmod(idx, len(self.tids))
+        filas = np.arange(n)
+        return Eleccion(self.eids[ie], self.tids[it], costo[filas, idx], margen_f[filas, idx],
+                        holgura.reshape(n, -1)[filas, idx], alguno)
+
+    # --- Escalar (para llamar en la toma de pedidos) ---
+    def _candidatos_producto(self, pid):
+        cands = self._candidatos.get(pid)
+        if cands is None:
+            lim = float(self.limite[pid])
+            cands = []
+            for idx in self._orden.tolist():
+                ie, it = divmod(idx, len(self.tids))
+                cands.append((float(self.costo[ie, it]), int(self.eids[ie]), int(self.tids[it]),
+                              float(self.cat.k[pid, self.eids[ie]]), float(self.vel[it])))
+            self._candidatos[pid] = cands = (lim, cands)
+        return cands
+
+    def _evaluar(self, pid, dist, k, vel, lim):
+        if vel > 0:
+            tiempo = dist / vel * 60
+        else:
+            tiempo = math.inf if dist > 0 else 0.0
+        kt = 0.0 if tiempo == 0 else k * (tiempo * 60)
+        fila = self.cat.productos[pid]
+        ta = self.temp_ambiente
+        temp = ta + (fila.temp_std - ta) * math.exp(-kt) if math.isfinite(k) else ta
+        signo = 1.0 if 'caliente' in fila.categoria else -1.0
+        holgura = (lim - kt) / k / 60.0 if k > 0 else math.inf
+        return kt <= lim, signo * (temp - fila.temp_crit), holgura
+
+    def elegir(self, pid, dist) -> EleccionPedido:
+        if pid not in self.cat.productos:
+            raise KeyError(f"Producto desconocido: {pid}")
+        lim, cands = self._candidatos_producto(pid)
+        mejor, reserva = None, None
+        for costo, eid, tid, k, vel in cands:
+            if mejor is not None and costo > mejor[0]:
+                break
+            ok, margen, holgura = self._evaluar(pid, dist, k, vel, lim)
+            opcion = (costo, eid, tid, margen, holgura)
+            if ok and (mejor is None or margen > mejor[3]):
+                mejor = opcion
+            if reserva is None or margen > reserva[3]:
+                reserva = opcion
+        if mejor is None:
+            return EleccionPedido(*reserva, False)
+        return EleccionPedido(*mejor, True)
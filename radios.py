@@ -0,0 +1,140 @@
+import math
+from dataclasses import dataclass
+import numpy as np
+
+import nucleo
+from catalogo import obtener_catalogo
+from lote import tiempo_hasta_temp
+from optimizador import costos_por_defecto
+
+# -----------------------------
+# Nivel 2.i: Radios de entrega
+# -----------------------------
+# El radio máximo de un (producto, empaque, transporte) es la distancia recorrida hasta
+# el tiempo crítico de critical_time: radio = vel · t_crítico / 60, con t_crítico en forma
+# cerrada (tiempo_hasta_temp). Se precalcula una vez como un arreglo (P, E, T) indexado
+# por ID, así cada consulta es una lectura. Para el empaque mínimo se ordenan los
+# empaques por costo y se guarda, por (producto, transporte), el máximo acumulado de sus
+# radios: el primer empaque cuyo umbral alcanza la distancia es el más barato que llega.
+# Los mapas de zona calculan la distancia desde la cocina sobre una grilla con NumPy.
+
+EXTENSION_KM = 10.0     # medio ancho de la grilla
+RESOLUCION_KM = 0.05
+FACTOR_RUTA = 1.0       # distancia por calle / distancia en línea recta
+
+
+@dataclass
+class MapaServicio:
+    xs: np.ndarray          # (nx,) km
+    ys: np.ndarray          # (ny,) km
+    valores: np.ndarray     # (ny, nx): bool (dentro del radio) o eid del empaque mínimo (-1: ninguno)
+
+    def __len__(self):
+        return self.valores.size
+
+
+class IndiceRadios:
+    def __init__(self, catalogo=None, temp_ambiente=None, costos_empaque=None):
+        self.cat = obtener_catalogo() if catalogo is None else catalogo
+        self.temp_ambiente = nucleo.TEMP_AMBIENTE if temp_ambiente is None else temp_ambiente
+        ce, _ = costos_por_defecto(self.cat)
+        ce.update(costos_empaque or {})
+        self.costos_empaque = ce
+        self.construir()
+
+    def construir(self):
+        # Volver a llamar después de cambiar el catálogo.
+        cat = self.cat
+        t_crit = tiempo_hasta_temp(cat.k, cat.temp_std[:, None], cat.temp_crit[:, None],
+                                   cat.caliente[:, None], cat.fria[:, None], self.temp_ambiente)   # (P, E)
+        vel = cat.vel_kmh
+        with np.errstate(invalid='ignore'):
+            radio = np.where(vel > 0, t_crit[:, :, None] * vel / 60, 0.0)
+        valido = (cat.producto_valido[:, None, None] & cat.empaque_valido[None, :, None]
+                  & cat.transporte_valido[None, None, :])
+        self.radio = np.where(valido, radio, np.nan)                            # (P, E, T) km
+
+        # A igual costo va primero el de menor ID.
+        orden = sorted(cat.empaques, key=lambda e: (self.costos_empaque[e], e))
+        self.orden_empaques = np.array(orden, dtype=np.intp)
+        por_costo = np.nan_to_num(self.radio[:, self.orden_empaques, :], nan=-np.inf)
+        self.umbral = np.maximum.accumulate(por_costo, axis=1).transpose(0, 2, 1).copy()   # (P, T, E)
+        self._sin_empaque = np.append(self.orden_empaques, -1)
+
+    # --- Consultas ---
+    def _validar(self, pid, eid=None, tid=None):
+        # Camino escalar: basta con buscar en los diccionarios del catálogo.
+        for i, tabla, nombre in ((pid, self.cat.productos, "Producto"), (eid, self.cat.empaques, "Empaque"),
+                                 (tid, self.cat.transportes, "Transporte")):
+            if i is not None and i not in tabla:
+                raise KeyError(f"{nombre} desconocido: {i}")
+
+    def radio_max(self, pid, eid, tid) -> float:
+        self._validar(pid, eid, tid)
+        return float(self.radio[pid, eid, tid])
+
+    def radios(self, pids, eids, tids) -> np.ndarray:
+        pids, eids, tids = self.cat.validar_ids(pids, eids, tids)
+        return self.radio[pids, eids, tids]
+
+    def puede_entregar(self, pids, eids, tids, dists) -> np.ndarray:
+        return np.asarray(dists, dtype=np.float64) <= self.radios(pids, eids, tids)
+
+    def empaque_minimo(self, pid, tid, dist_km):
+        # Empaque más barato cuyo radio alcanza dist_km, o None si ninguno llega.
+        self._validar(pid, tid=tid)
+        eid = self._sin_empaque[np.searchsorted(self.umbral[pid, tid], dist_km)]
+        return None if eid < 0 else int(eid)
+
+    def empaques_minimos(self, pids, tids, dists) -> np.ndarray:
+        # Versión por lotes de empaque_minimo; -1 donde ningún empaque llega.
+        pids, tids = self.cat.validar_ids(pids=pids, tids=tids)
+        dists = np.asarray(dists, dtype=np.float64)
+        i = (self.umbral[pids, tids] < dists[:, None]).sum(axis=1)
+        return self._sin_empaque[i]
+
+    # --- Mapas de zona ---
+    def _grilla(self, cocina, extension_km, resolucion_km, factor_ruta):
+        pasos = np.arange(-extension_km, extension_km + resolucion_km / 2, resolucion_km)
+        xs, ys = cocina[0] + pasos, cocina[1] + pasos
+        return xs, ys, np.hypot(pasos[None, :], pasos[:, None]) * factor_ruta
+
+    def mapa_zona(self, cocina, pid, eid, tid, extension_km=None, resolucion_km=RESOLUCION_KM,
+                  factor_ruta=FACTOR_RUTA) -> MapaServicio:
+        # cocina: (x, y) en km. Sin extension_km, la grilla cubre el radio con un 10 % de margen.
+        r = self.radio_max(pid, eid, tid)
+        if extension_km is None:
+            extension_km = r * 1.1 / factor_ruta if math.isfinite(r) and r > 0 else EXTENSION_KM
+        xs, ys, d = self._grilla(cocina, extension_km, resolucion_km, factor_ruta)
+        return MapaServicio(xs, ys, d <= r)
+
+    def mapa_empaques(self, cocina, pid, tid, extension_km=EXTENSION_KM, resolucion_km=RESOLUCION_KM,
+                      factor_ruta=FACTOR_RUTA) -> MapaServicio:
+        self._validar(pid, tid=tid)
+        xs, ys, d = self._grilla(cocina, extension_km, resolucion_km, factor_ruta)
+        return MapaServicio(xs, ys, self._sin_empaque[np.searchsorted(self.umbral[pid, tid], d)])
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Radio máximo de entrega por producto y empaque")
+    parser.add_argument('--transporte', type=int, default=1, help="ID del transporte")
+    parser.add_argument('--temp-ambiente', type=float, default=None)
+    args = parser.parse_args(argv)
+    indice = IndiceRadios(temp_ambiente=args.temp_ambiente)
+    cat = indice.cat
+    if args.transporte not in cat.transportes:
+        parser.error(f"Transporte desconocido: {args.transporte}")
+    eids = sorted(cat.empaques)
+    print(f"Radio máximo (km) en {cat.transportes[args.transporte].nombre}")
+    print(f"{'Producto':<22}" + ''.join(f"{'E' + str(e):>9}" for e in eids))
+    for pid in sorted(cat.productos):
+        celdas = []
+        for eid in eids:
+            r = indice.radio[pid, eid, args.transporte]
+            celdas.append(f"{'∞' if math.isinf(r) else f'{r:.2f}':>9}")
+        print(f"{cat.productos[pid].nombre:<22}" + ''.join(celdas))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+import nucleo
+from catalogo import Catalogo, establecer_catalogo, obtener_catalogo
+from calibracion import establecer_calibracion, obtener_calibracion
+
+# -----------------------------
+# Nivel 1.e: Renderizado por lotes
+# -----------------------------
+# Reparte la generación de resúmenes (PNG) y perfiles de temperatura entre un pool
+# de procesos con backend no interactivo. Cada proceso crea una sola figura y solo
+# actualiza los datos de la línea por pedido; la salida es idéntica byte a byte a
+# DeliverySim.generate_image / plot_temperature_profile. Los procesos reciben del
+# principal las fuentes del catálogo, la calibración y TEMP_AMBIENTE: con spawn o
+# forkserver no heredan nada de lo que se cambió en tiempo de ejecución.
+
+TAM_TAREA = 64
+
+_lienzo = None
+_renderizador = None
+
+
+def _iniciar_trabajador(fuentes=None, calib=None, temp_ambiente=None):
+    import matplotlib
+    matplotlib.use('Agg')
+    if fuentes is not None:
+        establecer_catalogo(Catalogo(*fuentes))
+    if calib is not None:
+        establecer_calibracion(calib)
+    if temp_ambiente is not None:
+        nucleo.TEMP_AMBIENTE = temp_ambiente
+
+
+class LienzoPerfil:
+    # Figura reutilizable equivalente a la que arma plot_temperature_profile con pyplot.
+    def __init__(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.fig = Figure(figsize=(6, 4))
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        self.linea, = self.ax.plot([], [], marker='o', linestyle='-')
+        self.ax.set_xlabel('Tiempo (min)')
+        self.ax.set_ylabel('Temperatura (°C)')
+        self.ax.grid(True)
+
+    def guardar(self, sim, path, num_points=50):
+        tiempos, temps = sim.temperature_profile(num_points)
+        self.linea.set_data(tiempos, temps)
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.ax.set_title(f"Perfil temperatura: {sim.food.nombre}")
+        self.fig.savefig(path)
+
+
+class RenderizadorResumen:
+    # La columna de etiquetas se dibuja una sola vez en una plantilla; por pedido solo
+    # se dibujan los valores. El resultado coincide con DeliverySim.summary_image.
+    ANCHO, ALTO = 450, 250
+
+    def __init__(self, tam_fuente=18):
+        from PIL import Image, ImageDraw
+        self.fuente = nucleo.cargar_fuente(tam_fuente)
+        self.plantilla = Image.new('RGB', (self.ANCHO, self.ALTO), 'white')
+        draw = ImageDraw.Draw(self.plantilla)
+        self.posiciones = []
+        y = 20
+        for etiqueta in nucleo.ETIQUETAS_RESUMEN:
+            draw.text((20, y), etiqueta, fill='black', font=self.fuente)
+            self.posiciones.append((20 + draw.textlength(etiqueta, font=self.fuente), y))
+            y += 30
+
+    def _dibujar(self, draw, valores, x0=0, y0=0):
+        for (x, y), valor in zip(self.posiciones, valores):
+            draw.text((x0 + x, y0 + y), valor, fill='black', font=self.fuente)
+
+    def imagen_valores(self, valores):
+        from PIL import ImageDraw
+        img = self.plantilla.copy()
+        self._dibujar(ImageDraw.Draw(img), valores)
+        return img
+
+    def imagen(self, sim):
+        return self.imagen_valores(sim.summary_values())
+
+    def valores_lote(self, res, catalogo=None):
+        cat = obtener_catalogo() if catalogo is None else catalogo
+        for pid, tid, dist, tiempo, temp_final, temp_corr in zip(
+                res.pid.tolist(), res.tid.tolist(), res.dist_km.tolist(), res.tiempo_min.tolist(),
+                res.temp_final.tolist(), res.temp_corrected.tolist()):
+            prod = cat.productos[pid]
+            yield nucleo.valores_resumen(prod.nombre, cat.transportes[tid].nombre, dist, tiempo,
+                                       prod.temp_std, temp_final, temp_corr)
+
+    def hojas_contacto(self, res, directorio='.', columnas=10, filas=10, prefijo='hoja',
+                       catalogo=None) -> list:
+        # Agrupa los resúmenes de un ResultadoLote en hojas grandes de columnas x filas,
+        # en vez de escribir un PNG por pedido.
+        from PIL import Image, ImageDraw
+        os.makedirs(directorio, exist_ok=True)
+        por_hoja = columnas * filas
+        rutas, hoja, draw = [], None, None
+        for i, valores in enumerate(self.valores_lote(res, catalogo)):
+            pos = i % por_hoja
+            if pos == 0:
+                if hoja is not None:
+                    rutas.append(self._guardar_hoja(hoja, directorio, prefijo, len(rutas)))
+                hoja = Image.new('RGB', (columnas * self.ANCHO, filas * self.ALTO), 'white')
+                draw = ImageDraw.Draw(hoja)
+            x0, y0 = (pos % columnas) * self.ANCHO, (pos // columnas) * self.ALTO
+            hoja.paste(self.plantilla, (x0, y0))
+            draw.rectangle((x0, y0, x0 + self.ANCHO - 1, y0 + self.ALTO - 1), outline='lightgray')
+            self._dibujar(draw, valores, x0, y0)
+        if hoja is not None:
+            rutas.append(self._guardar_hoja(hoja, directorio, prefijo, len(rutas)))
+        return rutas
+
+    @staticmethod
+    def _guardar_hoja(hoja, directorio, prefijo, n):
+        ruta = os.path.join(directorio, f"{prefijo}_{n:05d}.png")
+        hoja.save(ruta, compress_level=1)
+        return ruta
+
+
+def _obtener_renderizador():
+    global _renderizador
+    if _renderizador is None:
+        _renderizador = RenderizadorResumen()
+    return _renderizador
+
+
+def _obtener_lienzo():
+    global _lienzo
+    if _lienzo is None:
+        _lienzo = LienzoPerfil()
+    return _lienzo
+
+
+def k_valido(k):
+    return not (k == float('inf') or np.isinf(k) or np.isnan(k))
+
+
+def _renderizar_tarea(tarea):
+    indices, pids, eids, tids, dists, directorio, imagenes, graficos, num_points = tarea
+    rutas = []
+    for i, pid, eid, tid, dist in zip(indices, pids, eids, tids, dists):
+        with contextlib.redirect_stdout(io.StringIO()):
+            sim = nucleo.procesar_entrega(pid, eid, tid, dist)
+            if imagenes:
+                ruta = os.path.join(directorio, f"resumen_{i:07d}.png")
+                _obtener_renderizador().imagen(sim).save(ruta)
+                rutas.append(ruta)
+            if graficos:
+                ruta = os.path.join(directorio, f"perfil_{i:07d}.png")
+                if k_valido(sim.k):
+                    _obtener_lienzo().guardar(sim, ruta, num_points)
+                else:
+                    # Caso de error poco frecuente: se delega en el método original.
+                    sim.plot_temperature_profile(num_points, path=ruta)
+                rutas.append(ruta)
+    return rutas
+
+
+def renderizar_lote(pids, eids, tids, dists, directorio='.', imagenes=True, graficos=True,
+                    procesos=None, num_points=50, inicio=0, tam_tarea=TAM_TAREA) -> list:
+    os.makedirs(directorio, exist_ok=True)
+    pids, eids, tids = (np.asarray(a).tolist() for a in (pids, eids, tids))
+    dists = np.asarray(dists, dtype=np.float64).tolist()
+    indices = list(range(inicio, inicio + len(pids)))
+    tareas = [(indices[j:j + tam_tarea], pids[j:j + tam_tarea], eids[j:j + tam_tarea],
+               tids[j:j + tam_tarea], dists[j:j + tam_tarea], directorio, imagenes, graficos, num_points)
+              for j in range(0, len(pids), tam_tarea)]
+    if procesos == 1:
+        return [r for t in tareas for r in _renderizar_tarea(t)]
+    cat = obtener_catalogo()
+    fuentes = (cat.fuente_productos, cat.fuente_propiedades, cat.fuente_empaques,
+               cat.fuente_transportes, cat.dim_bebida, cat.dim_comida)
+    estado = (fuentes, obtener_calibracion(), nucleo.TEMP_AMBIENTE)
+    rutas = []
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                             initargs=estado) as pool:
+        for parte in pool.map(_renderizar_tarea, tareas):
+            rutas.extend(parte)
+    return rutas
@@ -0,0 +1,103 @@
+import math
+from dataclasses import dataclass
+import numpy as np
+
+import nucleo
+from catalogo import obtener_catalogo
+
+# -----------------------------
+# Nivel 1.g: Rutas por segmentos
+# -----------------------------
+# Una entrega real se compone de tramos (espera en cocina, auto caliente, subir a pie...)
+# con su propia temperatura ambiente y velocidad. Dentro de cada tramo la solución de
+# Newton es exacta, así que se encadena tramo a tramo:
+#   T_{i+1} = Ta_i + (T_i - Ta_i) · exp(-k · t_i)
+# sin pasos de tiempo. La versión por lotes recorre los S tramos con operaciones
+# sobre los N pedidos a la vez.
+
+
+@dataclass
+class Segmento:
+    nombre: str
+    temp_ambiente: float
+    tiempo_min: float = None
+    dist_km: float = None
+    vel_kmh: float = None
+
+    def duracion_min(self) -> float:
+        if self.tiempo_min is not None:
+            return self.tiempo_min
+        if self.vel_kmh:
+            return self.dist_km / self.vel_kmh * 60
+        return math.inf if self.dist_km else 0.0
+
+
+@dataclass
+class ResultadoSegmentos:
+    temps: np.ndarray           # (N, S+1): temperatura al inicio y al final de cada tramo
+    tiempos_acum: np.ndarray    # (N, S+1): minutos transcurridos
+    temp_final: np.ndarray      # (N,)
+    tiempo_critico: np.ndarray  # (N,): minuto en que se cruza la temp. crítica (inf si nunca)
+
+    def __len__(self):
+        return len(self.temp_final)
+
+
+def encadenar(k, temp_inicial, tiempos_min, temps_ambiente, temp_crit=None, caliente=None):
+    # k, temp_inicial: (N,). tiempos_min, temps_ambiente: (N, S) o (S,).
+    k = np.asarray(k, dtype=np.float64)
+    temp = np.asarray(temp_inicial, dtype=np.float64)
+    n = temp.shape[0]
+    tiempos_min = np.broadcast_to(np.asarray(tiempos_min, dtype=np.float64), (n, np.shape(tiempos_min)[-1]))
+    temps_ambiente = np.broadcast_to(np.asarray(temps_ambiente, dtype=np.float64), tiempos_min.shape)
+    s = tiempos_min.shape[1]
+
+    temps = np.empty((n, s + 1))
+    acum = np.zeros((n, s + 1))
+    temps[:, 0] = temp
+    cruce = np.full(n, np.inf)
+    if temp_crit is not None:
+        signo = np.where(caliente, 1.0, -1.0)
+        cruce = np.where(signo * (temp - temp_crit) < 0, 0.0, np.inf)
+    finito = np.isfinite(k)
+
+    for i in range(s):
+        ta, t = temps_ambiente[:, i], tiempos_min[:, i]
+        with np.errstate(invalid='ignore', over='ignore'):
+            nueva = ta + (temp - ta) * np.exp(-k * (t * 60))
+        nueva = np.where(finito, nueva, ta)
+        if temp_crit is not None:
+            cruza = np.isinf(cruce) & (signo * (nueva - temp_crit) < 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                dt = -np.log((temp_crit - ta) / (temp - ta)) / k / 60.0
+            dt = np.where(finito, np.clip(dt, 0.0, t), 0.0)
+            cruce = np.where(cruza, acum[:, i] + dt, cruce)
+        temp = nueva
+        temps[:, i + 1] = temp
+        acum[:, i + 1] = acum[:, i] + t
+    return temps, acum, cruce
+
+
+def simular_segmentos(pids, eids, tiempos_min, temps_ambiente, catalogo=None) -> ResultadoSegmentos:
+    cat = obtener_catalogo() if catalogo is None else catalogo
+    pids, eids = cat.validar_ids(pids, eids)
+    temps, acum, cruce = encadenar(cat.k[pids, eids], cat.temp_std[pids], tiempos_min, temps_ambiente,
+                                   cat.temp_crit[pids], cat.caliente[pids])
+    return ResultadoSegmentos(temps, acum, temps[:, -1], cruce)
+
+
+def simular_ruta(pids, eids, segmentos, catalogo=None) -> ResultadoSegmentos:
+    # Misma lista de tramos para todos los pedidos.
+    tiempos = [seg.duracion_min() for seg in segmentos]
+    ambientes = [nucleo.TEMP_AMBIENTE if seg.temp_ambiente is None else seg.temp_ambiente
+                 for seg in segmentos]
+    return simular_segmentos(np.atleast_1d(pids), np.atleast_1d(eids), tiempos, ambientes, catalogo)
+
+
+def tiempos_por_distancia(dists_km, vels_kmh):
+    # (N, S) de distancias y velocidades por tramo -> minutos por tramo.
+    dists_km = np.asarray(dists_km, dtype=np.float64)
+    vels_kmh = np.asarray(vels_kmh, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = dists_km / vels_kmh * 60
+    return np.where(vels_kmh > 0, t, np.where(dists_km > 0, np.inf, 0.0))
@@ -0,0 +1,248 @@
+import asyncio
+import json
+import sys
+import time
+import numpy as np
+
+import nucleo
+from catalogo import obtener_catalogo
+from calibracion import obtener_calibracion, cargar_calibracion
+from flujo import a_lista_json
+from lote import simular_lote, evaluar_lote
+
+# -----------------------------
+# Nivel 2.e: Servicio local de predicción
+# -----------------------------
+# Servidor HTTP mínimo sobre asyncio (TCP o socket Unix) que mantiene el catálogo y la
+# calibración cargados. Las solicitudes concurrentes se agrupan en micro-lotes: el
+# primer pedido abre una ventana de max_espera_ms y el lote se evalúa cuando se llena
+# (max_lote) o vence la ventana, con una sola pasada de simular_lote + evaluar_lote.
+#
+#   POST /predecir   {"pid": 13, "eid": 2, "tid": 1, "dist_km": 3.5}  (o una lista)
+#   GET  /salud
+#   GET  /metricas   (texto Prometheus; solo con --metricas, ver metricas.py)
+
+MAX_LOTE = 1024
+MAX_ESPERA_MS = 2.0
+CAMPOS_RESPUESTA = ('k', 'tiempo_min', 'temp_final', 'temp_corrected', 'tiempo_critico')
+
+
+class ErrorSolicitud(Exception):
+    pass
+
+
+class MicroLotes:
+    def __init__(self, max_lote=MAX_LOTE, max_espera_ms=MAX_ESPERA_MS):
+        self.max_lote = max_lote
+        self.max_espera = max_espera_ms / 1000.0
+        self.cola = asyncio.Queue()
+        self.lotes = 0
+        self.pedidos = 0
+        self._tarea = None
+
+    def iniciar(self):
+        self._tarea = asyncio.get_running_loop().create_task(self._bucle())
+
+    async def detener(self):
+        if self._tarea:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+
+    async def predecir(self, pedidos):
+        # pedidos: arreglo (n, 5) de pid, eid, tid, dist_km, temp_ambiente
+        futuro = asyncio.get_running_loop().create_future()
+        await self.cola.put((pedidos, futuro))
+        return await futuro
+
+    async def _bucle(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pendientes = [await self.cola.get()]
+            n = len(pendientes[0][0])
+            limite = loop.time() + self.max_espera
+            while n < self.max_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.cola.get(), restante)
+                except asyncio.TimeoutError:
+                    break
+                pendientes.append(item)
+                n += len(item[0])
+            self._evaluar(pendientes)
+
+    def _evaluar(self, pendientes):
+        datos = np.concatenate([p for p, _ in pendientes])
+        try:
+            res = simular_lote(datos[:, 0].astype(np.intp), datos[:, 1].astype(np.intp),
+                               datos[:, 2].astype(np.intp), datos[:, 3], temp_ambiente=datos[:, 4])
+            ev = evaluar_lote(res)
+        except Exception as e:
+            for _, futuro in pendientes:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        self.lotes += 1
+        self.pedidos += len(datos)
+        columnas = {c: a_lista_json(getattr(res, c)) for c in CAMPOS_RESPUESTA}
+        columnas['indice'] = ev.indice.tolist()
+        comentarios = ev.comentarios()
+        i = 0
+        for pedidos, futuro in pendientes:
+            j = i + len(pedidos)
+            if not futuro.done():
+                futuro.set_result([
+                    dict({c: columnas[c][f] for c in columnas}, comentario=comentarios[f])
+                    for f in range(i, j)])
+            i = j
+
+
+def _parsear_pedidos(cuerpo, cat):
+    try:
+        datos = json.loads(cuerpo or b'null')
+    except ValueError:
+        raise ErrorSolicitud("JSON inválido")
+    lista = datos if isinstance(datos, list) else [datos]
+    filas = []
+    for d in lista:
+        if not isinstance(d, dict):
+            raise ErrorSolicitud("Cada pedido debe ser un objeto JSON")
+        try:
+            pid, eid, tid = int(d['pid']), int(d['eid']), int(d['tid'])
+            dist = float(d['dist_km'] if 'dist_km' in d else d['dist'])
+            ta = float(d.get('temp_ambiente', nucleo.TEMP_AMBIENTE))
+        except (KeyError, TypeError, ValueError):
+            raise ErrorSolicitud("Se requieren pid, eid, tid y dist_km numéricos")
+        # Se valida aquí para que un pedido inválido no haga fallar el micro-lote completo.
+        if pid not in cat.productos or eid not in cat.empaques or tid not in cat.transportes:
+            raise ErrorSolicitud(f"ID desconocido en pedido {d}")
+        if dist < 0:
+            raise ErrorSolicitud("La distancia no puede ser negativa")
+        filas.append((pid, eid, tid, dist, ta))
+    if not filas:
+        raise ErrorSolicitud("Sin pedidos")
+    return np.array(filas, dtype=np.float64), isinstance(datos, list)
+
+
+class Servicio:
+    def __init__(self, max_lote=MAX_LOTE, max_espera_ms=MAX_ESPERA_MS, metricas=None):
+        self.cat = obtener_catalogo()
+        self.calib = obtener_calibracion()
+        self.lotes = MicroLotes(max_lote, max_espera_ms)
+        self.inicio = time.time()
+        self.metricas = metricas
+
+    async def _responder(self, writer, estado, cuerpo, mantener):
+        if isinstance(cuerpo, str):
+            datos, tipo = cuerpo.encode('utf-8'), 'text/plain; version=0.0.4'
+        else:
+            datos, tipo = json.dumps(cuerpo, ensure_ascii=False, allow_nan=False).encode('utf-8'), 'application/json'
+        razon = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}[estado]
+        writer.write(f"HTTP/1.1 {estado} {razon}\r\nContent-Type: {tipo}; charset=utf-8\r\n"
+                     f"Content-Length: {len(datos)}\r\nConnection: {'keep-alive' if mantener else 'close'}\r\n\r\n"
+                     .encode('latin1') + datos)
+        await writer.drain()
+
+    async def atender(self, reader, writer):
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, ruta, version = linea.decode('latin1').split()
+                except ValueError:
+                    break
+                cabeceras = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b'\r\n', b'\n', b''):
+                        break
+                    nombre, _, valor = h.decode('latin1').partition(':')
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                try:
+                    largo = int(cabeceras.get('content-length', 0))
+                    if largo < 0:
+                        raise ValueError
+                except ValueError:
+                    # Sin un largo válido no se puede delimitar el cuerpo: responder y cerrar.
+                    await self._responder(writer, 400, {"error": "Content-Length inválido"}, False)
+                    break
+                cuerpo = await reader.readexactly(largo)
+                mantener = (cabeceras.get('connection', '').lower() != 'close'
+                            and version.upper() == 'HTTP/1.1')
+                estado, respuesta = await self._despachar(metodo, ruta, cuerpo)
+                await self._responder(writer, estado, respuesta, mantener)
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _despachar(self, metodo, ruta, cuerpo):
+        if metodo == 'GET' and ruta == '/salud':
+            return 200, {"estado": "ok", "lotes": self.lotes.lotes, "pedidos": self.lotes.pedidos,
+                         "segundos": round(time.time() - self.inicio, 1)}
+        if metodo == 'POST' and ruta == '/predecir':
+            try:
+                pedidos, es_lista = _parsear_pedidos(cuerpo, self.cat)
+                resultados = await self.lotes.predecir(pedidos)
+            except ErrorSolicitud as e:
+                return 400, {"error": str(e)}
+            except Exception as e:
+                return 500, {"error": str(e)}
+            return 200, resultados if es_lista else resultados[0]
+        if metodo == 'GET' and ruta == '/metricas' and self.metricas is not None:
+            return 200, self.metricas.a_prometheus()
+        return 404, {"error": f"Ruta no encontrada: {metodo} {ruta}"}
+
+    async def servir(self, host='127.0.0.1', puerto=8080, socket=None):
+        self.lotes.iniciar()
+        if socket:
+            servidor = await asyncio.start_unix_server(self.atender, path=socket)
+            destino = socket
+        else:
+            servidor = await asyncio.start_server(self.atender, host, puerto)
+            destino = f"http://{host}:{puerto}"
+        print(f"Servicio de predicción escuchando en {destino}", file=sys.stderr)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            await self.lotes.detener()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Servicio local de predicción con micro-lotes")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8080)
+    parser.add_argument('--socket', help="Ruta de socket Unix (en lugar de TCP)")
+    parser.add_argument('--max-lote', type=int, default=MAX_LOTE)
+    parser.add_argument('--max-espera-ms', type=float, default=MAX_ESPERA_MS)
+    parser.add_argument('--calibracion', help="Archivo .npz de calibración")
+    parser.add_argument('--metricas', help="Medir cada etapa (GET /metricas) y guardarlas en este archivo al salir")
+    args = parser.parse_args(argv)
+    if args.calibracion:
+        cargar_calibracion(args.calibracion)
+    metricas = None
+    if args.metricas:
+        from metricas import instrumentar
+        metricas = instrumentar()
+    servicio = Servicio(args.max_lote, args.max_espera_ms, metricas)
+    try:
+        asyncio.run(servicio.servir(args.host, args.puerto, args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if metricas is not None:
+            metricas.guardar(args.metricas)
+
+
+if __name__ == '__main__':
+    main()